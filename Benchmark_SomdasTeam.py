@@ -0,0 +1,301 @@
+from array import array
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from somdas.graph import component_labels, count_components_after_removal
+from somdas.tarjan import (find_articulation_points_and_bridges, vertex_removal_impacts,
+                           bridge_removal_impacts)
+from somdas.simulation import MultiRemovalSimulator
+from somdas.loader import load_graph
+
+try:
+    import networkx as nx  # Only used to cross-check results on the smaller graphs
+except ImportError:
+    nx = None
+
+# Settings (all can be overridden on the command line, see --help)
+families = ['path', 'star', 'grid', 'powerlaw', 'er']
+sizes = [10 ** 3, 10 ** 4, 10 ** 5]  # Target edge counts; the suite supports up to 10**7
+repeats = 3  # Timed runs per stage, the fastest one is kept
+check_limit = 10 ** 5  # Cross-check against networkx up to this many edges
+multi_trials = 200  # Multi-AP failure trials timed per graph
+multi_k = 10  # APs removed per trial
+baseline_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+time_tolerance = 0.25  # Fail when a stage is more than 25% slower than the baseline...
+min_time_delta = 0.02  # ...and at least this many seconds slower (timer noise on tiny graphs)
+memory_tolerance = 0.25  # Same for tracemalloc peak memory
+
+
+#Synthetic graph generators. Each returns (src, dst) arrays with about m edges.
+def generate_path(m, rng):
+    return array('q', range(m)), array('q', range(1, m + 1))
+
+
+def generate_star(m, rng):
+    return array('q', [0]) * m, array('q', range(1, m + 1))
+
+
+# Road-like: a square lattice with a fifth of its edges dropped, which leaves
+# dead ends, long detours and plenty of bridges and articulation points
+def generate_grid(m, rng, keep=0.8):
+    side = max(2, int((m / (2 * keep)) ** 0.5) + 1)
+    src, dst = array('q'), array('q')
+    for r in range(side):
+        for c in range(side):
+            v = r * side + c
+            if c + 1 < side and rng.random() < keep:
+                src.append(v)
+                dst.append(v + 1)
+            if r + 1 < side and rng.random() < keep:
+                src.append(v)
+                dst.append(v + side)
+    return src, dst
+
+
+# Power-law: Barabasi-Albert preferential attachment, two edges per new node.
+# Endpoints are drawn from the list of all previous edge endpoints, which
+# picks a node with probability proportional to its degree.
+def generate_powerlaw(m, rng, per_node=2):
+    src, dst = array('q', [0]), array('q', [1])
+    endpoints = array('q', [0, 1])
+    node = 2
+    while len(src) < m:
+        for _ in range(per_node):
+            target = endpoints[rng.randrange(len(endpoints))]
+            src.append(node)
+            dst.append(target)
+            endpoints.append(node)
+            endpoints.append(target)
+        node += 1
+    return src, dst
+
+
+# Erdos-Renyi G(n, m) with average degree 3 (a giant component with many
+# trees hanging off it). Repeated pairs and self-loops are dropped by the
+# loader, so the final edge count is very slightly below m.
+def generate_er(m, rng, average_degree=3):
+    n = max(2, int(2 * m / average_degree))
+    src = array('q', (rng.randrange(n) for _ in range(m)))
+    dst = array('q', (rng.randrange(n) for _ in range(m)))
+    return src, dst
+
+
+GENERATORS = {
+    'path': generate_path,
+    'star': generate_star,
+    'grid': generate_grid,
+    'powerlaw': generate_powerlaw,
+    'er': generate_er,
+}
+
+
+def write_edge_list(path, src, dst, block=1 << 16):
+    with open(path, 'w') as f:
+        for start in range(0, len(src), block):
+            f.write(''.join(f"{u}\t{v}\n" for u, v in zip(src[start:start + block], dst[start:start + block])))
+
+
+#Timing and memory of one stage
+# Fastest wall time of `repeat` runs, then one more run under tracemalloc for the peak
+def measure(function, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, result
+
+
+# Time every stage on one edge-list file; returns ({stage: record}, graph, aps, bridges)
+def benchmark_graph(path, repeat, trials, k, seed):
+    stages = {}
+
+    seconds, peak, graph = measure(lambda: load_graph(path, use_cache=False), repeat)
+    stages['load'] = {'seconds': seconds, 'peak_bytes': peak}
+    load_graph(path)  # Write the binary cache once...
+    seconds, peak, _ = measure(lambda: load_graph(path), repeat)
+    stages['load_cached'] = {'seconds': seconds, 'peak_bytes': peak}  # ...and time mapping it
+
+    seconds, peak, (aps, bridges) = measure(lambda: find_articulation_points_and_bridges(graph), repeat)
+    stages['tarjan'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    seconds, peak, _ = measure(lambda: component_labels(graph), repeat)
+    stages['components'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    seconds, peak, _ = measure(lambda: vertex_removal_impacts(graph), repeat)
+    stages['ap_impacts'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    seconds, peak, _ = measure(lambda: bridge_removal_impacts(graph, bridges), repeat)
+    stages['bridge_impacts'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    if len(aps) >= 2 and trials > 0:
+        ap_indices = [graph.index_of(ap) for ap in aps]
+        size = min(k, len(ap_indices))
+
+        def multi():
+            simulator = MultiRemovalSimulator(graph)
+            rng = random.Random(seed)
+            for _ in range(trials):
+                simulator.components_without(rng.sample(ap_indices, size))
+        seconds, peak, _ = measure(multi, repeat)
+        stages['multi_ap'] = {'seconds': seconds, 'peak_bytes': peak}
+
+    return stages, graph, aps, bridges
+
+
+# Compare APs, bridges, component count and sampled AP impacts with networkx; returns the problems
+def cross_check(src, dst, graph, aps, bridges, seed, samples=20):
+    G = nx.Graph()
+    G.add_nodes_from(src)
+    G.add_nodes_from(dst)  # A self-loop still puts its node in the graph
+    G.add_edges_from((u, v) for u, v in zip(src, dst) if u != v)
+    problems = []
+    if set(aps) != set(nx.articulation_points(G)):
+        problems.append('articulation points differ')
+    if {frozenset(b) for b in bridges} != {frozenset(b) for b in nx.bridges(G)}:
+        problems.append('bridges differ')
+    components = nx.number_connected_components(G)
+    if component_labels(graph)[1] != components:
+        problems.append('component count differs')
+    _, fragments, _ = vertex_removal_impacts(graph)
+    for ap in random.Random(seed).sample(aps, min(samples, len(aps))):
+        H = G.copy()
+        H.remove_node(ap)
+        if fragments[graph.index_of(ap)] != nx.number_connected_components(H):
+            problems.append(f'components after removing AP {ap} differ')
+        if count_components_after_removal(graph, ap) != nx.number_connected_components(H):
+            problems.append(f'count_components_after_removal({ap}) differs')
+    return problems
+
+
+#Regression check against the stored baseline
+def compare_with_baseline(results, baseline, time_tol, min_delta, memory_tol):
+    regressions = []
+    for key, record in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        if (record['seconds'] > old['seconds'] * (1 + time_tol)
+                and record['seconds'] - old['seconds'] > min_delta):
+            regressions.append(f"{key}: {old['seconds']:.4f}s -> {record['seconds']:.4f}s")
+        if record['peak_bytes'] > old['peak_bytes'] * (1 + memory_tol) + 4096:
+            regressions.append(f"{key}: peak {old['peak_bytes']:,} -> {record['peak_bytes']:,} bytes")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SomdasTeam graph engines on synthetic graphs.")
+    parser.add_argument('--families', nargs='+', choices=sorted(GENERATORS), default=families)
+    parser.add_argument('--sizes', nargs='+', type=int, default=sizes, help="target edge counts")
+    parser.add_argument('--repeat', type=int, default=repeats)
+    parser.add_argument('--check-limit', type=int, default=check_limit,
+                        help="cross-check against networkx up to this many edges (0 disables)")
+    parser.add_argument('--multi-trials', type=int, default=multi_trials)
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--baseline', default=baseline_file)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store this run as the new baseline instead of comparing against it")
+    parser.add_argument('--no-baseline', action='store_true',
+                        help="only time and cross-check; skip the regression check")
+    parser.add_argument('--output', help="also write this run's results as JSON to this file")
+    parser.add_argument('--tolerance', type=float, default=time_tolerance)
+    parser.add_argument('--memory-tolerance', type=float, default=memory_tolerance)
+    return parser.parse_args(argv)
+
+
+####################################################
+#Main###############################################
+####################################################
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    failures = []
+
+    print(f"{'Graph':<18} {'Edges':>10} {'Stage':<15} {'Time(s)':>10} {'Peak MiB':>10}")
+    print("-" * 68)
+    with tempfile.TemporaryDirectory(prefix='somdas-bench-') as workdir:
+        for family in args.families:
+            for m in args.sizes:
+                rng = random.Random(f"{args.seed}:{family}:{m}")
+                src, dst = GENERATORS[family](m, rng)
+                path = os.path.join(workdir, f"{family}-{m}.txt")
+                write_edge_list(path, src, dst)
+
+                stages, graph, aps, bridges = benchmark_graph(path, args.repeat, args.multi_trials,
+                                                              multi_k, args.seed)
+                for stage, record in stages.items():
+                    record['nodes'] = graph.n
+                    record['edges'] = graph.m
+                    results[f"{family}/{m}/{stage}"] = record
+                    print(f"{family + '-' + str(m):<18} {graph.m:>10,} {stage:<15} "
+                          f"{record['seconds']:>10.4f} {record['peak_bytes'] / 2 ** 20:>10.2f}")
+
+                if nx is not None and m <= args.check_limit:
+                    problems = cross_check(src, dst, graph, aps, bridges, args.seed)
+                    failures.extend(f"{family}/{m}: {problem}" for problem in problems)
+                    print(f"{'':<18} {'':>10} {'networkx check':<15} {'FAIL' if problems else 'PASS':>10}")
+
+                del graph
+                for name in os.listdir(workdir):
+                    os.remove(os.path.join(workdir, name))
+
+    run = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'machine': platform.machine(), 'cpus': os.cpu_count(),
+                 'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'repeat': args.repeat, 'seed': args.seed},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(run, f, indent=1, sort_keys=True)
+
+    if args.update_baseline or not (args.no_baseline or os.path.exists(args.baseline)):
+        # The first run on a checkout (no baseline yet) records one: nothing to compare against
+        first = not args.update_baseline
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=1, sort_keys=True)
+        if first:
+            print(f"\nNo baseline yet: this run was recorded as the baseline in {args.baseline}; "
+                  f"later runs are compared against it.")
+        else:
+            print(f"\nBaseline written to {args.baseline}")
+    elif args.no_baseline:
+        print("\nRegression check skipped (--no-baseline).")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline['results'], args.tolerance,
+                                            min_time_delta, args.memory_tolerance)
+        if baseline['meta'].get('platform') != run['meta']['platform']:
+            print(f"\nNOTE: baseline was recorded on {baseline['meta'].get('platform')}")
+        failures.extend(f"REGRESSION {r}" for r in regressions)
+        print(f"\nCompared {len(results)} measurements with {args.baseline}: "
+              f"{len(regressions)} regression(s)")
+
+    if nx is None:
+        print("networkx is not installed: cross-checks were skipped.")
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll benchmarks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from somdas.tarjan import ConnectivityOracle, vertex_removal_impacts, bridge_removal_impacts
+from somdas.simulation import MultiRemovalSimulator
+from somdas.loader import load_graph
+
+# Settings (all can be overridden on the command line, see --help)
+host = '127.0.0.1'  # Local clients only
+port = 8765
+max_batch = 100000  # Queries accepted in one request
+max_body = 64 << 20  # Bytes accepted in one request
+
+
+#One graph kept warm: loaded and preprocessed once, then only read
+# A loaded graph with the oracle, impact tables and block-cut tree the queries need. Read-only
+# after __init__, so request threads share it; each thread gets its own simulator scratch marks
+class WarmGraph:
+    def __init__(self, name, filename, ram_cap=None):
+        start = time.perf_counter()
+        self.name = name
+        self.filename = filename
+        self.csr = csr = load_graph(filename, ram_cap=ram_cap)
+        self.oracle = oracle = ConnectivityOracle(csr)
+        self.components, self.fragments, self.lcc_sizes = vertex_removal_impacts(csr)
+        self.largest = max((oracle.size[v] for v in range(csr.n) if oracle.parent[v] == -1), default=0)
+        _, impacts = bridge_removal_impacts(csr)
+        # (smaller id, larger id) -> (components, largest component) once the bridge is gone
+        self.bridges = {(min(bridge), max(bridge)): (fragments, lcc) for bridge, fragments, _, _, lcc in impacts}
+        self.aps = sum(1 for f in self.fragments if f > self.components)
+        self.structure = MultiRemovalSimulator(csr).structure()
+        self._local = threading.local()
+        self.load_seconds = time.perf_counter() - start
+
+    def simulator(self):
+        simulator = getattr(self._local, 'simulator', None)
+        if simulator is None:
+            simulator = self._local.simulator = MultiRemovalSimulator(self.csr, self.structure)
+        return simulator
+
+    def summary(self):
+        return {'graph': self.name, 'file': self.filename, 'nodes': self.csr.n, 'edges': self.csr.m,
+                'components': self.components, 'largest_component': self.largest,
+                'aps': self.aps, 'bridges': len(self.bridges), 'load_seconds': round(self.load_seconds, 4)}
+
+    def _index(self, node):
+        idx = self.csr.index_of(node)
+        if idx == -1:
+            raise LookupError(f"node {node} is not in the graph")
+        return idx
+
+    def _edge(self, edge):
+        if not isinstance(edge, list) or len(edge) != 2:
+            raise ValueError(f"an edge must be a list of two node ids, got {edge!r}")
+        a, b = (self._index(node) for node in edge)
+        if b not in self.csr.neighbors_of(a):
+            raise LookupError(f"edge {list(edge)} is not in the graph")
+        return a, b
+
+    # Checked like node_impact/edge_impact, so an unknown id is an error, not a no-op failure
+    def _failure(self, query):
+        # JSON has no tuples: an edge failure arrives as a two-element list
+        without = query.get('without')
+        if without is None:
+            return None
+        if isinstance(without, list):
+            self._edge(without)
+            return tuple(without)
+        self._index(without)
+        return without
+
+    # Answer one query dict; see QUERY_OPS for the operations
+    def answer(self, query):
+        if not isinstance(query, dict):
+            raise TypeError("each query must be a JSON object")
+        op = query.get('op')
+        if op == 'node_impact':
+            i = self._index(query['node'])
+            return {'components': self.fragments[i], 'largest_component': self.lcc_sizes[i],
+                    'is_ap': self.fragments[i] > self.components}
+        if op == 'edge_impact':
+            self._edge(query['edge'])
+            key = (min(query['edge']), max(query['edge']))
+            if key in self.bridges:
+                components, largest = self.bridges[key]
+                return {'components': components, 'largest_component': largest, 'is_bridge': True}
+            return {'components': self.components, 'largest_component': self.largest, 'is_bridge': False}
+        if op == 'components':
+            return {'components': self.oracle.components_without(self._failure(query))}
+        if op == 'connected':
+            self._index(query['u'])
+            self._index(query['v'])
+            return {'connected': self.oracle.connected(query['u'], query['v'], self._failure(query))}
+        if op == 'remove_nodes':
+            if not isinstance(query['nodes'], list):
+                raise TypeError("'nodes' must be a list of node ids")
+            removed = {self._index(node) for node in query['nodes']}
+            return {'components': self.simulator().components_without(removed)}
+        raise ValueError(f"unknown op {op!r}, expected one of {sorted(QUERY_OPS)}")
+
+    # Answers in query order; a bad query gets an error entry instead of failing the batch
+    def answer_batch(self, queries):
+        results = []
+        for query in queries:
+            try:
+                results.append(self.answer(query))
+            except KeyError as e:
+                results.append({'error': f"missing field {e.args[0]!r}"})
+            except (LookupError, ValueError, TypeError) as e:
+                results.append({'error': str(e)})
+        return results
+
+
+QUERY_OPS = {
+    'node_impact': "{'node': id} -> components and largest component without the node, is_ap",
+    'edge_impact': "{'edge': [u, v]} -> components and largest component without the edge, is_bridge",
+    'components': "{'without': id | [u, v] | null} -> components after one vertex or edge failure",
+    'connected': "{'u': id, 'v': id, 'without': id | [u, v] | null} -> still connected?",
+    'remove_nodes': "{'nodes': [ids]} -> components after deleting all the nodes together",
+}
+
+
+#HTTP front end: JSON in, JSON out
+# GET /graphs (loaded graphs), GET /ops (operations), POST /query
+# {"graph": name, "queries": [...]} -> {"results": [...], "seconds": ...}
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so a client can send many batches on one connection
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/graphs':
+            self._send(200, {'graphs': [graph.summary() for graph in self.server.graphs.values()]})
+        elif self.path == '/ops':
+            self._send(200, {'ops': QUERY_OPS})
+        else:
+            self._send(404, {'error': f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/query':
+            self._send(404, {'error': f"unknown path {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > max_body:
+            self.close_connection = True
+            self._send(413, {'error': f"request larger than {max_body} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send(400, {'error': f"bad request: {e!r}"})
+            return
+        if not isinstance(request, dict):
+            self._send(400, {'error': "bad request: the body must be a JSON object with 'graph' and 'queries'"})
+            return
+        try:
+            graph = self.server.graphs[request['graph']]
+            queries = request['queries']
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': f"bad request: {e!r}; loaded graphs: {sorted(self.server.graphs)}"})
+            return
+        if not isinstance(queries, list) or len(queries) > max_batch:
+            self._send(400, {'error': f"queries must be a list of at most {max_batch} queries"})
+            return
+        start = time.perf_counter()
+        results = graph.answer_batch(queries)
+        self._send(200, {'results': results, 'seconds': time.perf_counter() - start})
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix-socket'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# One thread per connection; all threads share the warm graphs
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, graphs, verbose=False):
+        self.graphs = graphs
+        self.verbose = verbose
+        super().__init__(address, QueryHandler)
+
+
+# The same service on a Unix domain socket (file permissions control access)
+class UnixQueryServer(QueryServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind expects a (host, port) address
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+# Client helper: send one batch over HTTP and return the list of results
+def post_queries(graph, queries, url=f"http://{host}:{port}"):
+    request = urllib.request.Request(url + '/query', data=json.dumps({'graph': graph, 'queries': queries}).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['results']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep graphs loaded and answer what-if failure queries.")
+    parser.add_argument('files', nargs='+', help="edge lists to load; each is served under its file name "
+                                                 "(or NAME=PATH to choose the name)")
+    parser.add_argument('--host', default=host)
+    parser.add_argument('--port', type=int, default=port)
+    parser.add_argument('--socket', help="serve on this Unix socket path instead of TCP")
+    parser.add_argument('--ram-cap', type=int, help="out-of-core loading with this many bytes of working memory")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    return parser.parse_args(argv)
+
+
+####################################################
+#Main###############################################
+####################################################
+
+def main(argv=None):
+    args = parse_args(argv)
+    graphs = {}
+    for spec in args.files:
+        name, _, path = spec.rpartition('=')
+        name = name or os.path.basename(path)
+        print(f"Loading {path} as '{name}'...", flush=True)
+        graphs[name] = WarmGraph(name, path, args.ram_cap)
+        summary = graphs[name].summary()
+        print(f"  {summary['nodes']:,} nodes, {summary['edges']:,} edges, {summary['aps']:,} APs, "
+              f"{summary['bridges']:,} bridges, ready in {summary['load_seconds']:.2f}s")
+
+    if args.socket:
+        server = UnixQueryServer(args.socket, graphs, args.verbose)
+        where = f"unix socket {args.socket}"
+    else:
+        server = QueryServer((args.host, args.port), graphs, args.verbose)
+        where = f"http://{args.host}:{server.server_port}"
+    print(f"Serving {len(graphs)} graph(s) on {where} (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
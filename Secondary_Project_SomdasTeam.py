@@ -1,13 +1,77 @@
-import networkx as nx
 from collections import Counter
+from array import array
 import statistics 
+import heapq
 import random
+import os
+from somdas.graph import CSRGraph
+from somdas.tarjan import iter_blocks, write_blocks, iter_separation_pairs, write_separation_pairs
+from somdas.simulation import (MultiRemovalSimulator, simulate_multi_removal, TrialStats,
+                               trial_summary, resilience_curve, write_resilience_curves,
+                               RESILIENCE_MODES, RESILIENCE_ORDERS, targeted_attack,
+                               TARGETED_OBJECTIVES)
+from somdas.loader import ResultCache, graph_digest
+from somdas.backends import get_backend
+from somdas.instrumentation import ProgressReporter, PhaseRecorder
 #Replace this string with the file location of the dataset
 filename="C:\\Users\\somen\\Desktop\\Project\\power_grid_uci.txt"
 
 # Settings for Multi-Point Failure Simulation
-multi_point_trials = 40000 # How many random sets of APs to test
+multi_point_trials = 40000 # How many random sets of APs to test (the upper limit when a precision is set)
 num_ap_removal = 10  # How many APs to remove simultaneously in each trial
+multi_point_precision = None  # e.g. 0.005: stop once the average is known to within +-0.5% (None = run every trial)
+multi_point_confidence = 0.95  # Confidence level of that interval
+multi_point_tail = 0.99  # Tail quantile reported next to the maximum; enough trials are run to estimate it
+num_workers = 1  # Processes sharing the trials and, on the python backend, the AP/bridge detection, so backend 'auto' then picks python (1 = run in this process; os.cpu_count() = every core)
+random_seed = None  # Fix to reproduce a parallel run exactly; None picks (and prints) a fresh seed
+
+# Settings for the greedy targeted attack (the adversary always removes the currently most damaging AP)
+attack_steps = 10  # APs removed one after another
+attack_objectives = TARGETED_OBJECTIVES  # "fragments" (most new components) and/or "lcc" (largest LCC drop)
+
+# Settings for the progressive removal (resilience curve) mode
+resilience_analysis = False  # Off by default: every run removes the whole graph one node/edge at a time
+resilience_runs = 100  # Removal orders averaged per curve
+resilience_curve_file = "resilience_curves.csv"  # Series for plotting; None to skip writing
+
+# Settings for the block (biconnected component) analysis
+block_file = None  # e.g. "blocks.jsonl" to stream every block (nodes + attached APs) to disk
+
+# Settings for the critical vertex pair (separation pair) analysis. The search is quadratic:
+# one DFS over the block per node of the block, O(|B| * E(B)), so it is off by default
+separation_pair_analysis = False
+separation_pair_file = None  # e.g. "separation_pairs.csv" to write every pair with its fragments and LCC
+separation_pair_max_block = 5000  # Skip blocks with more nodes than this (None = analyse every block); skipped blocks are listed
+
+# Result cache: APs, bridges, impact tables and seeded simulations are reused
+# across runs on an unchanged graph
+result_cache_dir = ".somdas_cache"  # None disables the cache
+result_cache_limit = 1 << 30  # Bytes on disk; least recently used results are evicted first
+
+# Out-of-core mode: bytes of working memory for loading, component counting and
+# AP/bridge detection (e.g. 2 << 30); None = build the graph in memory
+ram_cap = None
+
+# Compute backend for loading, detection, component counts and single-failure impacts:
+# 'auto' (SciPy when installed, else pure Python), 'scipy', 'python' or 'networkx' (slow reference)
+backend = "auto"
+
+# Instrumentation: per-phase timing and memory, one JSON record appended per run
+metrics_file = "run_metrics.jsonl"
+trace_memory = False  # tracemalloc peak per phase (makes the run much slower)
+profile_phase = None  # e.g. "ap_analysis" writes <dataset>.ap_analysis.prof via cProfile
+
+# Live progress for a job monitor: current phase, items done, rate, ETA and RSS in a
+# Prometheus textfile (e.g. node_exporter's textfile directory); None = off
+progress_file = None  # e.g. "somdas_secondary.prom"
+progress_interval = 5  # Seconds between updates
+
+
+# Result of compute(), taken from the result cache when there is one and it has it
+def cached_result(cache, digest, kind, compute, **params):
+    if cache is None:
+        return compute()
+    return cache.cached(cache.key(digest, kind, **params), compute)
 
 
 # FUnction to classify articulation points
@@ -24,29 +88,32 @@ def classify_impact(increase):
         return "Minor (Non-critical)"
 
 
+# Convert a networkx graph to the compact CSR graph used by the one-pass engines
+def graph_to_csr(G):
+    if isinstance(G, CSRGraph):
+        return G
+    src = array('q')
+    dst = array('q')
+    for u, v in G.edges():
+        src.append(u)
+        dst.append(v)
+    return CSRGraph.from_edges(src, dst, nodes=G.nodes())
+
+
 #Function to carry out AP impact analysis
-def analyze_single_ap_impact(G, all_articulation_points, initial_components):
+def analyze_single_ap_impact(G, all_articulation_points, initial_components, engine=None, progress=None):
     print(f"  Running {len(all_articulation_points)} independent AP removal experiments...")
     results = []
-    total_nodes = G.number_of_nodes()
+    engine = engine or get_backend('python')
+    progress = progress or ProgressReporter()
+    total_nodes = engine.size(G)[0]
+    # One block-cut tree pass gives the outcome of every single-AP removal
+    impacts = engine.node_impacts(G, all_articulation_points)
+    progress.expect(len(all_articulation_points))
     
-    for i, ap in enumerate(all_articulation_points):
-    #    print("hello")
-        G_copy = G.copy()
-        G_copy.remove_node(ap)
-        
-        fragments = nx.number_connected_components(G_copy)
-        
+    for i, (ap, fragments, lcc_size) in enumerate(impacts):
         # Component Size Analysis
-        if fragments > 0:
-            component_nodes = list(nx.connected_components(G_copy))
-            largest_component = max(component_nodes, key=len) if component_nodes else set()
-            lcc_size = len(largest_component)
-            lcc_relative_size = lcc_size / (total_nodes - 1) if total_nodes > 1 else 0 # -1 because we removed a node
-        else:
-            lcc_size = 0
-            lcc_relative_size = 0
-            largest_component = set()
+        lcc_relative_size = lcc_size / (total_nodes - 1) if total_nodes > 1 else 0 # -1 because we removed a node
 
         results.append({
             "element_id": ap,
@@ -58,6 +125,7 @@ def analyze_single_ap_impact(G, all_articulation_points, initial_components):
         })
         
         # Progress indicator
+        progress.tick()
         if (i + 1) % 50 == 0 or i == len(all_articulation_points) - 1:
             # FIX: Added flush=True to ensure the counter updates visibly
             print(f"    ...tested AP {i + 1}/{len(all_articulation_points)}", end='\r', flush=True)
@@ -67,37 +135,32 @@ def analyze_single_ap_impact(G, all_articulation_points, initial_components):
 
 
 #function to carry out bridge impact analysis
-def analyze_single_bridge_impact(G, all_bridges, initial_components):
+def analyze_single_bridge_impact(G, all_bridges, initial_components, engine=None, progress=None):
     print(f"  Running {len(all_bridges)} independent bridge removal experiments...")
     results = []
-    total_nodes = G.number_of_nodes()
+    engine = engine or get_backend('python')
+    progress = progress or ProgressReporter()
+    total_nodes = engine.size(G)[0]
+    # One DFS pass: each bridge splits its component into the DFS subtree below it and the rest
+    impacts = engine.bridge_impacts(G, all_bridges)
+    progress.expect(len(all_bridges))
 
-    for i, bridge in enumerate(all_bridges):
-        G_copy = G.copy()
-        G_copy.remove_edge(*bridge) # Remove the specific edge
-        
-        fragments = nx.number_connected_components(G_copy)
-        
+    for i, (bridge, fragments, side_u, side_v, lcc_size) in enumerate(impacts):
         # Component Size Analysis
-        if fragments > 0:
-            component_nodes = list(nx.connected_components(G_copy))
-            largest_component = max(component_nodes, key=len) if component_nodes else set()
-            lcc_size = len(largest_component)
-            lcc_relative_size = lcc_size / total_nodes if total_nodes > 0 else 0
-        else:
-            lcc_size = 0
-            lcc_relative_size = 0
+        lcc_relative_size = lcc_size / total_nodes if total_nodes > 0 else 0
             
         results.append({
             "element_id": bridge,
             "element_type": "Edge (Bridge)",
             "fragments": fragments,
             "increase": fragments - initial_components,
+            "side_sizes": (side_u, side_v),
             "lcc_size": lcc_size,
             "lcc_relative_size": lcc_relative_size
         })
         
         # Progress indicator
+        progress.tick()
         if (i + 1) % 200 == 0 or i == len(all_bridges) - 1:
             # FIX: Added flush=True to ensure the counter updates visibly
             print(f"    ...tested Bridge {i + 1}/{len(all_bridges)}", end='\r', flush=True)
@@ -105,33 +168,166 @@ def analyze_single_bridge_impact(G, all_bridges, initial_components):
     print("\n  Bridge Analysis completed.")
     return results
 
+#Function to summarise the biconnected blocks, streamed one at a time
+def analyze_blocks(G, block_file=None, top=5, progress=None):
+    print("  Streaming biconnected components...")
+    C = graph_to_csr(G)
+    progress = progress or ProgressReporter()
+    size_buckets = Counter()
+    most_aps = []  # Min-heap of the `top` blocks with the most attached APs
+    summary = {"blocks": 0, "bridges": 0, "largest_size": 0, "largest_edges": 0}
+
+    def tally(blocks):
+        # Pass-through that keeps running statistics, so the blocks can be written as they stream
+        for block in blocks:
+            summary["blocks"] += 1
+            if block.edge_count == 1:
+                summary["bridges"] += 1
+            if block.size > summary["largest_size"]:
+                summary["largest_size"], summary["largest_edges"] = block.size, block.edge_count
+            if block.size <= 2:
+                size_buckets["2 (bridge)" if block.size == 2 else "1 (isolated)"] += 1
+            elif block.size < 10:
+                size_buckets["3-9"] += 1
+            elif block.size < 100:
+                size_buckets["10-99"] += 1
+            else:
+                size_buckets["100+"] += 1
+            entry = (len(block.attached_aps), block.size, block.index, block.edge_count)
+            if len(most_aps) < top:
+                heapq.heappush(most_aps, entry)
+            elif entry > most_aps[0]:
+                heapq.heapreplace(most_aps, entry)
+            progress.tick()
+            yield block
+
+    if block_file:
+        write_blocks(tally(iter_blocks(C)), block_file)
+    else:
+        for _ in tally(iter_blocks(C)):
+            pass
+    summary["size_buckets"] = size_buckets
+    summary["most_attached_aps"] = sorted(most_aps, reverse=True)
+    print("  Block Analysis completed.")
+    return summary
+
+
+#Function to find the critical vertex pairs: two nodes that split their block when both fail
+def analyze_separation_pairs(G, all_articulation_points, pair_file=None, max_block_size=None, top=10,
+                             progress=None):
+    print("  Searching every block for separation pairs...")
+    C = graph_to_csr(G)
+    progress = progress or ProgressReporter()
+    ap_set = set(all_articulation_points)
+    most_fragments = []  # Min-heap of the `top` pairs creating the most fragments
+    smallest_lcc = []    # Min-heap (negated LCC) of the `top` pairs leaving the smallest LCC
+    summary = {"pairs": 0, "hidden_pairs": 0}
+    skipped = []  # (size, smallest node) of every block over max_block_size, left unsearched
+
+    def tally(pairs):
+        # Pass-through that keeps running statistics, so the pairs can be written as they stream
+        for x, y, fragments, lcc in pairs:
+            summary["pairs"] += 1
+            if x not in ap_set and y not in ap_set:
+                summary["hidden_pairs"] += 1  # Neither node alone disconnects anything
+            entry = (fragments, -lcc, x, y)
+            if len(most_fragments) < top:
+                heapq.heappush(most_fragments, entry)
+            elif entry > most_fragments[0]:
+                heapq.heapreplace(most_fragments, entry)
+            entry = (-lcc, fragments, x, y)
+            if len(smallest_lcc) < top:
+                heapq.heappush(smallest_lcc, entry)
+            elif entry > smallest_lcc[0]:
+                heapq.heapreplace(smallest_lcc, entry)
+            progress.tick()  # Pairs found; their total is not known in advance
+            yield x, y, fragments, lcc
+
+    if pair_file:
+        write_separation_pairs(tally(iter_separation_pairs(C, max_block_size, skipped)), pair_file)
+    else:
+        for _ in tally(iter_separation_pairs(C, max_block_size, skipped)):
+            pass
+    summary["skipped_blocks"] = sorted(skipped, reverse=True)
+    summary["most_fragments"] = [(x, y, f, -negative_lcc) for f, negative_lcc, x, y in sorted(most_fragments, reverse=True)]
+    summary["smallest_lcc"] = [(x, y, f, -negative_lcc) for negative_lcc, f, x, y in sorted(smallest_lcc, reverse=True)]
+    print("  Separation Pair Analysis completed.")
+    return summary
+
+
+#Function to compute the resilience curves (LCC and components vs. fraction removed)
+def analyze_resilience_curves(G, runs, seed=None, progress=None):
+    print(f"  Computing node and edge removal curves ({runs} orderings each)...")
+    C = graph_to_csr(G)
+    progress = progress or ProgressReporter()
+    progress.expect(runs * len(RESILIENCE_MODES) * len(RESILIENCE_ORDERS))
+    curves = []
+    for mode in RESILIENCE_MODES:
+        for order in RESILIENCE_ORDERS:
+            curves.append(resilience_curve(C, mode, order, runs=runs, seed=seed, progress=progress))
+    print("  Resilience Curve Analysis completed.")
+    return curves
+
+
+#Function to run the greedy targeted attack: removes the currently most damaging AP, step by step
+def analyze_targeted_attack(G, steps, objective, progress=None):
+    print(f"  Attacking by {objective}: up to {steps} APs, each chosen on the graph left by the previous ones...")
+    progress = progress or ProgressReporter()
+    progress.expect(steps)
+    trajectory = targeted_attack(graph_to_csr(G), steps, objective, progress)
+    print("  Targeted Attack completed.")
+    return trajectory
+
+
 #Function to carry out Multi point AP impact analysis
-def analyze_multi_ap_failure(G, all_articulation_points, num_trials, num_aps_per_trial):
-    print(f"  Running {num_trials} multi-point failure simulations ({num_aps_per_trial} APs each)...")
-    multi_results = []
+def analyze_multi_ap_failure(G, all_articulation_points, num_trials, num_aps_per_trial, workers=1, seed=None,
+                             precision=None, confidence=0.95, tail=0.99, check_every=1000, progress=None):
+    limit = "up to " if precision is not None else ""
+    print(f"  Running {limit}{num_trials} multi-point failure simulations ({num_aps_per_trial} APs each)...")
+    # Trial outcomes are streamed into running statistics; with a precision the
+    # run stops once the confidence interval of the average is narrow enough
+    stats = TrialStats()
+    progress = progress or ProgressReporter()
+    progress.expect(num_trials)
+    # The block-cut tree is built once; a trial searches only the blocks holding two or more
+    # removed APs, but in the grid's main block that is most of it (about 1/3 of a full recount)
+    simulator = MultiRemovalSimulator(graph_to_csr(G))
+    ap_indices = [simulator.csr.index_of(ap) for ap in all_articulation_points]
+
+    if workers > 1 or seed is not None:
+        # Seeded chunks over a process pool sharing one memory-mapped copy of the graph
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        print(f"  Using {workers} worker process(es), seed {seed}")
+        summary = simulate_multi_removal(simulator.csr, ap_indices, num_trials, num_aps_per_trial,
+                                         seed, workers=workers, simulator=simulator, chunk_size=check_every,
+                                         precision=precision, confidence=confidence, tail=tail,
+                                         progress=progress)
+        print("  Multi-AP Analysis completed.")
+        return summary
     
+    stopped_early = False
     for i in range(num_trials):
         # Select unique APs for this trial
-        aps_to_remove = random.sample(all_articulation_points, num_aps_per_trial)
+        aps_to_remove = random.sample(ap_indices, num_aps_per_trial)
         
-        G_copy = G.copy()
-        G_copy.remove_nodes_from(aps_to_remove)
-        fragments = nx.number_connected_components(G_copy)
-        multi_results.append(fragments)
+        fragments = simulator.components_without(aps_to_remove)
+        stats.add(fragments)
+        progress.tick()
 
         if (i + 1) % 20 == 0 or i == num_trials - 1:
             print(f"    ...completed trial {i + 1}/{num_trials}", end='\r', flush=True)
+        if (precision is not None and (i + 1) % check_every == 0 and i < num_trials - 1
+                and stats.precise_enough(precision, confidence, tail)):
+            stopped_early = True
+            break
 
     print("\n  Multi-AP Analysis completed.")
 
-    if not multi_results:
+    if not stats.count:
         return None
 
-    return {
-        "avg_fragments": statistics.mean(multi_results),
-        "max_fragments": max(multi_results),
-        "min_fragments": min(multi_results)
-    }
+    return trial_summary(stats, confidence, tail, stopped_early)
 
 
 
@@ -144,21 +340,43 @@ if __name__ == "__main__":
     print(f"Starting Full Analysis for: {filename}")
     print(f"{'-'*80}")
     
-    G = nx.read_edgelist(filename, comments='#', nodetype=int, data=False)
+    # Each phase also becomes the current phase of the live progress file
+    progress = ProgressReporter(progress_file, run=filename, script='secondary', interval=progress_interval)
+    recorder = PhaseRecorder(filename, script='secondary', trace_memory=trace_memory,
+                             profile_phase=profile_phase, progress=progress)
+    
+    # Shared chunked loader (SNAP, bare pairs, MatrixMarket, gzip/bz2) backed by the binary CSR cache
+    engine = get_backend(backend, ram_cap, num_workers)
+    print(f"Compute backend: {engine.name}")
+    with recorder.phase('load'):
+        C = engine.load(filename)
+    num_nodes, num_edges = engine.size(C)
+    
+    result_cache = ResultCache(result_cache_dir, result_cache_limit) if result_cache_dir else None
+    digest = graph_digest(graph_to_csr(C)) if result_cache else None
     
     print("\n--- Initial State ---")
-    print(f"  Graph: {G.number_of_nodes():,} nodes, {G.number_of_edges():,} edges")
-    initial_components = nx.number_connected_components(G)
+    print(f"  Graph: {num_nodes:,} nodes, {num_edges:,} edges")
+    with recorder.phase('baseline_components'):
+        initial_components = cached_result(result_cache, digest, 'components',
+                                           lambda: engine.components(C))
     print(f"  Initial Components: {initial_components}")
     
     print("\n--- Articulation Point (AP) Analysis ---")
-    all_aps = list(nx.articulation_points(G))
+    # One Tarjan pass over all components gives both the APs and the bridges
+    with recorder.phase('detection'):
+        all_aps, all_bridges = cached_result(result_cache, digest, 'aps_bridges',
+                                             lambda: engine.articulation_points_and_bridges(C))
+    recorder.note(nodes=num_nodes, edges=num_edges, components=initial_components, backend=engine.name,
+                  aps=len(all_aps), bridges=len(all_bridges))
     if not all_aps:
         print("  No Articulation Points found.")
         ap_results = []
     else:
         print(f"  Found {len(all_aps):,} APs.")
-        ap_results = analyze_single_ap_impact(G, all_aps, initial_components)
+        with recorder.phase('ap_analysis'):
+            ap_results = cached_result(result_cache, digest, 'ap_impacts',
+                                       lambda: analyze_single_ap_impact(C, all_aps, initial_components, engine, progress))
 
 
     ####################################################
@@ -189,20 +407,18 @@ if __name__ == "__main__":
         
 
     print("\n--- Bridge Analysis ---")
-    all_bridges = list(nx.bridges(G)) if nx.is_connected(G) else []
-    if not nx.is_connected(G):
-         print("  Graph is disconnected, finding bridges within components...")
-         for component in nx.connected_components(G):
-             if len(component) > 1:
-                 subgraph = G.subgraph(component)
-                 all_bridges.extend(list(nx.bridges(subgraph)))
+    if initial_components > 1:
+         print("  Graph is disconnected, bridges were found within each component.")
     
     if not all_bridges:
         print("  No Bridges found.")
         bridge_results = []
     else:
         print(f"  Found {len(all_bridges):,} Bridges.")
-        bridge_results = analyze_single_bridge_impact(G, all_bridges, initial_components)
+        with recorder.phase('bridge_analysis'):
+            bridge_results = cached_result(result_cache, digest, 'bridge_impacts',
+                                           lambda: analyze_single_bridge_impact(C, all_bridges, initial_components, engine,
+                                                                                progress))
     
     # Process Bridge results
     if bridge_results:
@@ -228,16 +444,128 @@ if __name__ == "__main__":
         print(f"    - Avg. LCC Size after Bridge removal: {avg_lcc_size_bridge * 100:.2f}% of original nodes")
     
     
+    print("\n--- Block (Biconnected Component) Analysis ---")
+    with recorder.phase('block_analysis'):
+        block_stats = analyze_blocks(C, block_file, progress=progress)
+    print(f"  Found {block_stats['blocks']:,} blocks ({block_stats['bridges']:,} of them single-edge bridges).")
+    print(f"  Largest block: {block_stats['largest_size']:,} nodes, {block_stats['largest_edges']:,} edges "
+          f"({block_stats['largest_size'] / num_nodes * 100 if num_nodes else 0:.2f}% of nodes)")
+    print("  Block sizes (nodes):")
+    for bucket in ("1 (isolated)", "2 (bridge)", "3-9", "10-99", "100+"):
+        print(f"    - {bucket:<14} {block_stats['size_buckets'][bucket]:,}")
+    print("  Blocks with the most attached APs (failure points on their boundary):")
+    for aps_attached, size, index, edge_count in block_stats['most_attached_aps']:
+        print(f"    - Block #{index:<8} {size:>8,} nodes {edge_count:>8,} edges {aps_attached:>6,} APs")
+    if block_file:
+        print(f"  Every block written to {block_file}")
+    
+    
+    if separation_pair_analysis:
+        print("\n--- Critical Vertex Pairs (Separation Pairs within Blocks) ---")
+        with recorder.phase('separation_pairs'):
+            run_pairs = lambda: analyze_separation_pairs(C, all_aps, separation_pair_file, separation_pair_max_block,
+                                                         progress=progress)
+            if separation_pair_file:
+                pair_stats = run_pairs()  # Writing the file needs the full stream
+            else:
+                pair_stats = cached_result(result_cache, digest, 'separation_pairs', run_pairs,
+                                           max_block_size=separation_pair_max_block)
+        recorder.note(separation_pairs=pair_stats['pairs'])
+        print(f"  Found {pair_stats['pairs']:,} pairs of nodes that disconnect their block when both fail; "
+              f"{pair_stats['hidden_pairs']:,} of them involve no articulation point.")
+        if pair_stats.get('skipped_blocks'):
+            # The search is quadratic per block, so these were not searched at all: their pairs are missing above
+            skipped = pair_stats['skipped_blocks']
+            print(f"  NOT SEARCHED: {len(skipped)} block(s) larger than {separation_pair_max_block:,} nodes "
+                  f"({sum(size for size, _ in skipped):,} nodes in total); their pairs are not included.")
+            for size, node in skipped[:5]:
+                print(f"    block of {size:,} nodes containing node {node}")
+            if len(skipped) > 5:
+                print(f"    ... and {len(skipped) - 5} more")
+        for title, key in (("creating the most fragments", "most_fragments"), ("leaving the smallest LCC", "smallest_lcc")):
+            if not pair_stats[key]:
+                continue
+            print(f"\n  Top {len(pair_stats[key])} pairs {title}:")
+            print(f"  {'Node Pair':<25} | {'Fragments':<10} | {'LCC Size':<12} | {'LCC %':<8}")
+            print("  " + "-" * 65)
+            for x, y, fragments, lcc in pair_stats[key]:
+                print(f"  {str((x, y)):<25} | {fragments:<10} | {lcc:<12,} | {lcc / num_nodes * 100 if num_nodes else 0:<7.2f}%")
+        if separation_pair_file:
+            print(f"  Every pair written to {separation_pair_file}")
+    
+    
     # --- Multi-Point Failure Simulation (APs) ---
     print("\n--- Multi-Point AP Failure Simulation ---")
-    multi_ap_stats = analyze_multi_ap_failure(G, all_aps, multi_point_trials, num_ap_removal)
+    with recorder.phase('multi_ap'):
+        run_multi_ap = lambda: analyze_multi_ap_failure(C, all_aps, multi_point_trials, num_ap_removal,
+                                                        workers=num_workers, seed=random_seed,
+                                                        precision=multi_point_precision,
+                                                        confidence=multi_point_confidence, tail=multi_point_tail,
+                                                        progress=progress)
+        if random_seed is None:
+            multi_ap_stats = run_multi_ap()  # A fresh random run is never reused
+        else:
+            multi_ap_stats = cached_result(result_cache, digest, 'multi_ap', run_multi_ap,
+                                           trials=multi_point_trials, k=num_ap_removal, seed=random_seed,
+                                           precision=multi_point_precision, confidence=multi_point_confidence,
+                                           tail=multi_point_tail)
+    recorder.note(multi_point_trials=multi_ap_stats['trials'] if multi_ap_stats else 0,
+                  num_ap_removal=num_ap_removal, workers=num_workers)
     if multi_ap_stats:
-        print(f"  Simultaneously removing {num_ap_removal} random APs ({multi_point_trials} trials):")
-        print(f"    - Average Fragments Created: {multi_ap_stats['avg_fragments']:.2f}")
+        stopped = ", precision reached" if multi_ap_stats['stopped_early'] else ""
+        print(f"  Simultaneously removing {num_ap_removal} random APs ({multi_ap_stats['trials']} trials{stopped}):")
+        print(f"    - Average Fragments Created: {multi_ap_stats['avg_fragments']:.2f} "
+              f"({multi_ap_stats['confidence'] * 100:g}% CI {multi_ap_stats['ci_low']:.2f} - {multi_ap_stats['ci_high']:.2f}, "
+              f"std dev {multi_ap_stats['stdev_fragments']:.2f})")
+        print(f"    - Median Fragments Created: {multi_ap_stats['median_fragments']}")
+        print(f"    - {multi_ap_stats['tail'] * 100:g}% of Trials Created At Most: {multi_ap_stats['tail_fragments']} Fragments")
         print(f"    - Maximum Fragments Created: {multi_ap_stats['max_fragments']}")
         print(f"    - Minimum Fragments Created: {multi_ap_stats['min_fragments']}")
     
     
+    # --- Greedy Targeted Attack (APs) ---
+    print("\n--- Targeted AP Attack (Greedy) ---")
+    for objective in attack_objectives:
+        with recorder.phase(f'targeted_attack_{objective}'):
+            trajectory = cached_result(result_cache, digest, 'targeted_attack',
+                                       lambda: analyze_targeted_attack(C, attack_steps, objective, progress),
+                                       steps=attack_steps, objective=objective)
+        print(f"  {'Step':<6} | {'Removed AP':<12} | {'Damage':<8} | {'Components':<12} | {'LCC Size':<12} | {'LCC %':<8}")
+        print("  " + "-" * 75)
+        for point in trajectory:
+            node = '-' if point['node'] is None else str(point['node'])
+            print(f"  {point['step']:<6} | {node:<12} | {point['damage']:<8} | {point['components']:<12,} | "
+                  f"{point['lcc']:<12,} | {point['lcc'] / num_nodes * 100 if num_nodes else 0:<7.2f}%")
+        if len(trajectory) <= attack_steps:
+            print(f"  Stopped after {len(trajectory) - 1} step(s): no remaining AP does any more damage.")
+        if multi_ap_stats and objective == 'fragments' and len(trajectory) > num_ap_removal:
+            print(f"  Targeted removal of {num_ap_removal} APs leaves {trajectory[num_ap_removal]['components']:,} "
+                  f"components, against {multi_ap_stats['avg_fragments']:.2f} on average for random ones.")
+    recorder.note(attack_steps=attack_steps)
+    
+    
+    # --- Progressive Removal (Resilience Curves) ---
+    if resilience_analysis:
+        print("\n--- Resilience Curves (Progressive Removal) ---")
+        with recorder.phase('resilience_curves'):
+            run_curves = lambda: analyze_resilience_curves(C, resilience_runs, seed=random_seed, progress=progress)
+            if random_seed is None:
+                resilience_curves = run_curves()
+            else:
+                resilience_curves = cached_result(result_cache, digest, 'resilience_curves', run_curves,
+                                                  runs=resilience_runs, seed=random_seed)
+        for curve in resilience_curves:
+            # First point where the largest component holds under half of the nodes
+            half = next((f for f, lcc in zip(curve['fraction_removed'], curve['lcc_fraction'])
+                         if lcc < 0.5), None)
+            half_text = f"{half * 100:.1f}%" if half is not None else "never"
+            print(f"    - {curve['mode'].capitalize()} removal, {curve['order']:<8}: "
+                  f"LCC below 50% of nodes after removing {half_text} of {curve['mode']}s")
+        if resilience_curve_file:
+            write_resilience_curves(resilience_curve_file, resilience_curves)
+            print(f"  Curves written to {resilience_curve_file}")
+    
+    
     ####################################################
     ###Conclusion#######################################
     ####################################################
@@ -286,5 +614,19 @@ if __name__ == "__main__":
             print(f"  Simultaneous failure of {num_ap_removal} APs leads to significant fragmentation")
             print(f"  (up to {multi_ap_stats['max_fragments']} components observed).")
     
+    if result_cache:
+        print(f"\nResult cache ({result_cache_dir}): {result_cache.hits} hit(s), {result_cache.misses} miss(es)")
+        recorder.note(result_cache_hits=result_cache.hits, result_cache_misses=result_cache.misses)
+    
+    if metrics_file:
+        record = recorder.write(metrics_file)
+        print(f"\nPhase timings ({record['total_seconds']:.2f}s total) appended to {metrics_file}:")
+        for entry in record['phases']:
+            print(f"  {entry['name']:<20} {entry['seconds']:>10.4f}s")
+    
+    progress.close()
+    if progress_file:
+        print(f"\nLive progress was written to {progress_file}")
+    
     print(f"\nAnalysis complete for {filename}.")
     print("\n" + "-"*80)
\ No newline at end of file
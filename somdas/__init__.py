@@ -0,0 +1 @@
+#Graph analysis engines shared by the Primary, Secondary, Benchmark and Query service scripts
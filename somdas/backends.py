@@ -0,0 +1,252 @@
+#Backends: the same analyses on pure Python, SciPy or networkx
+from array import array
+import warnings
+import weakref
+from somdas.storage import Workspace
+from somdas.graph import (_unmask, as_csr, count_components_after_bridge_removal,
+                          count_components_after_removal, GraphView)
+from somdas.tarjan import (bridge_removal_impacts, dfs_lowpoints,
+                           find_articulation_points_and_bridges, vertex_removal_impacts)
+from somdas.loader import iter_edge_chunks, load_graph
+
+
+#Compute backends: one analysis interface, interchangeable engines
+# Analysis interface shared by every backend (load, view, size, articulation_points_and_bridges,
+# components, node_impacts, bridge_impacts), here on the pure-Python engines
+class PythonBackend:
+
+    name = 'python'
+
+    def __init__(self, ram_cap=None, workers=1):
+        self.ram_cap = ram_cap
+        self.workers = workers
+
+    def load(self, filename):
+        return load_graph(filename, ram_cap=self.ram_cap)
+
+    def view(self, graph):
+        return GraphView(graph)
+
+    def size(self, graph):
+        return graph.n, graph.m
+
+    # The dfs_lowpoints() arrays every other analysis is derived from
+    def lowpoints(self, graph):
+        return dfs_lowpoints(graph, Workspace(self.ram_cap))
+
+    def articulation_points_and_bridges(self, graph):
+        return find_articulation_points_and_bridges(graph, self.ram_cap, workers=self.workers)
+
+    def components(self, graph, without=None):
+        if isinstance(without, (tuple, list)):
+            return count_components_after_bridge_removal(graph, tuple(without), self.ram_cap)
+        return count_components_after_removal(graph, -1 if without is None else without, self.ram_cap)
+
+    def node_impacts(self, graph, nodes):
+        csr = as_csr(graph)
+        _, fragments, lcc_sizes = vertex_removal_impacts(csr, self.lowpoints(csr))
+        return [(node, fragments[i], lcc_sizes[i]) for node, i in ((node, csr.index_of(node)) for node in nodes)]
+
+    def bridge_impacts(self, graph, bridges):
+        return bridge_removal_impacts(graph, bridges, self.lowpoints(graph))[1]
+
+
+# Same engines with the graph-wide passes in C (scipy.sparse.csgraph) on the CSR arrays:
+# one DFS for the forest, low-links from one vectorised pass
+class SciPyBackend(PythonBackend):
+
+    name = 'scipy'
+
+    def __init__(self, ram_cap=None, workers=1):
+        super().__init__(ram_cap, workers)
+        import numpy
+        from scipy import sparse
+        from scipy.sparse import csgraph
+        self._np, self._sparse, self._csgraph = numpy, sparse, csgraph
+        self._matrices = weakref.WeakKeyDictionary()
+        self._masks = weakref.WeakKeyDictionary()
+
+    def _matrix(self, csr):
+        matrix = self._matrices.get(csr)
+        if matrix is None:
+            np = self._np
+            neighbors = np.frombuffer(csr.neighbors, dtype=np.int32)
+            matrix = self._sparse.csr_matrix((np.ones(len(neighbors), dtype=np.int8), neighbors,
+                                              np.frombuffer(csr.offsets, dtype=np.int64)), shape=(csr.n, csr.n))
+            self._matrices[csr] = matrix
+        return matrix
+
+    def _to_array(self, values):
+        result = array('i')
+        result.frombytes(values.astype(self._np.int32).tobytes())
+        return result
+
+    def lowpoints(self, graph):
+        if isinstance(graph, GraphView):
+            return super().lowpoints(graph)  # The csgraph DFS cannot skip masked elements
+        csr = as_csr(graph)
+        np = self._np
+        n = csr.n
+        matrix = self._matrix(csr)
+        if n == 0:
+            return array('i'), array('i'), array('i'), array('i')
+        _, labels = self._csgraph.connected_components(matrix, directed=False)
+        roots = np.unique(labels, return_index=True)[1]
+        # Vertex n points at the first vertex of every component, so one DFS covers them all
+        indptr = np.append(matrix.indptr, matrix.indptr[-1] + len(roots))
+        extended = self._sparse.csr_matrix((np.ones(len(matrix.indices) + len(roots), dtype=np.int8),
+                                            np.concatenate((matrix.indices, roots)), indptr), shape=(n + 1, n + 1))
+        order, parent = self._csgraph.depth_first_order(extended, n, directed=True, return_predecessors=True)
+        order = order[1:]
+        parent = parent[:n].astype(np.int32)
+        parent[parent == n] = -1
+        disc = np.empty(n, dtype=np.int32)
+        disc[order] = np.arange(n, dtype=np.int32)
+
+        degree = np.diff(matrix.indptr)
+        neighbors = matrix.indices
+        reached = disc[neighbors]
+        reached[neighbors == np.repeat(parent, degree)] = n  # The tree edge to the parent is not a back edge
+        low = disc.copy()
+        has_edges = degree > 0
+        low[has_edges] = np.minimum(low[has_edges],
+                                    np.minimum.reduceat(reached, matrix.indptr[:-1][has_edges]))
+        del reached
+
+        order, parent, disc = self._to_array(order), self._to_array(parent), self._to_array(disc)
+        low = self._to_array(low)
+        for v in reversed(order):
+            p = parent[v]
+            if p != -1 and low[v] < low[p]:
+                low[p] = low[v]
+        return order, parent, disc, low
+
+    def articulation_points_and_bridges(self, graph):
+        return find_articulation_points_and_bridges(graph, self.ram_cap, self.lowpoints(graph))
+
+    def _masked(self, csr):
+        # Float copy of the matrix with its own neighbour array, reused by every
+        # component count: a masked entry points back at its row (a self-loop),
+        # and the float data needs no conversion in csgraph
+        matrix = self._masks.get(csr)
+        if matrix is None:
+            base = self._matrix(csr)
+            matrix = self._sparse.csr_matrix((self._np.ones(len(base.indices)), base.indices.copy(), base.indptr),
+                                             shape=base.shape)
+            self._masks[csr] = matrix
+        return matrix
+
+    def components(self, graph, without=None):
+        csr, view = _unmask(graph)
+        np = self._np
+        matrix = self._masked(csr)
+        indptr, indices = matrix.indptr, matrix.indices
+        nodes = set(view.removed_nodes) if view is not None else set()
+        edges = [(u, v) for u, others in view.cut.items() for v in others] if view is not None else []
+        if isinstance(without, (tuple, list)):
+            a, b = (csr.index_of(node) for node in without)
+            if a != -1 and b != -1:
+                edges += [(a, b), (b, a)]
+        elif without is not None and csr.index_of(without) != -1:
+            nodes.add(csr.index_of(without))
+        changed = []
+        for u in nodes:
+            start, end = indptr[u], indptr[u + 1]
+            edges += [(w, u) for w in csr.neighbors[start:end]]
+            indices[start:end] = u
+            changed.append(slice(start, end))
+        for u, v in edges:
+            start = indptr[u]
+            positions = start + np.flatnonzero(indices[start:indptr[u + 1]] == v)
+            indices[positions] = u
+            changed.append(positions)
+        try:
+            # The matrix is symmetric, so strong components are the connected
+            # ones, and csgraph needs no transposed copy to find them
+            count = self._csgraph.connected_components(matrix, directed=True, connection='strong',
+                                                       return_labels=False)
+        finally:
+            original = self._matrix(csr).indices
+            for positions in changed:
+                indices[positions] = original[positions]
+        return count - len(nodes)  # Each removed vertex is left as a component of its own
+
+
+# Slow reference on networkx: a graph copy per removal. For checking the other backends
+class NetworkXBackend:
+
+    name = 'networkx'
+
+    def __init__(self, ram_cap=None, workers=1):
+        import networkx
+        self._nx = networkx
+
+    def load(self, filename):
+        G = self._nx.Graph()
+        for src, dst in iter_edge_chunks(filename):
+            G.add_nodes_from(src)
+            G.add_nodes_from(dst)  # A self-loop still puts its node in the graph
+            G.add_edges_from((u, v) for u, v in zip(src, dst) if u != v)
+        return G
+
+    def view(self, graph):
+        return self._nx.restricted_view(graph, (), ())
+
+    def size(self, graph):
+        return graph.number_of_nodes(), graph.number_of_edges()
+
+    def articulation_points_and_bridges(self, graph):
+        # APs in id order like the CSR engines, so seeded sampling picks the same ones;
+        # bridges stay in networkx's order
+        return sorted(self._nx.articulation_points(graph)), list(self._nx.bridges(graph))
+
+    def _without(self, graph, without):
+        H = graph.copy()
+        if isinstance(without, (tuple, list)):
+            if H.has_edge(*without):
+                H.remove_edge(*without)
+        elif without is not None and without in H:
+            H.remove_node(without)
+        return H
+
+    def components(self, graph, without=None):
+        return self._nx.number_connected_components(self._without(graph, without))
+
+    def node_impacts(self, graph, nodes):
+        impacts = []
+        for node in nodes:
+            H = self._without(graph, node)
+            impacts.append((node, self._nx.number_connected_components(H),
+                            max((len(c) for c in self._nx.connected_components(H)), default=0)))
+        return impacts
+
+    def bridge_impacts(self, graph, bridges):
+        impacts = []
+        for u, v in bridges:
+            H = self._without(graph, (u, v))
+            impacts.append(((u, v), self._nx.number_connected_components(H),
+                            len(self._nx.node_connected_component(H, u)),
+                            len(self._nx.node_connected_component(H, v)),
+                            max((len(c) for c in self._nx.connected_components(H)), default=0)))
+        return impacts
+
+
+BACKENDS = {'python': PythonBackend, 'scipy': SciPyBackend, 'networkx': NetworkXBackend}
+
+
+# Backend by name. 'auto' is scipy when installed, else python (also with a ram_cap, since
+# the SciPy passes build whole-graph arrays, or workers > 1, which only the python backend uses)
+def get_backend(name='auto', ram_cap=None, workers=1):
+    if name == 'auto':
+        if ram_cap is None and workers <= 1:
+            try:
+                return SciPyBackend(workers=workers)
+            except ImportError:
+                pass
+        return PythonBackend(ram_cap, workers)
+    if name not in BACKENDS:
+        raise ValueError(f"backend must be 'auto' or one of {sorted(BACKENDS)}")
+    if workers > 1 and name != 'python':
+        warnings.warn(f"the {name} backend ignores workers={workers}; only the python backend "
+                      f"detects APs and bridges on several processes", stacklevel=2)
+    return BACKENDS[name](ram_cap, workers)
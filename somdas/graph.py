@@ -0,0 +1,280 @@
+#Graph structures: CSR arrays, the edge-list builder and masked views
+from array import array
+from bisect import bisect_left
+from somdas.storage import Workspace
+
+
+#Compact CSR (compressed sparse row) graph...uNdirected
+# Read-only graph as flat arrays: nodes renumbered 0..n-1 by id, neighbours of i are
+# neighbors[offsets[i]:offsets[i + 1]], each edge stored both ways, loops and repeats dropped
+class CSRGraph:
+
+    def __init__(self, offsets, neighbors, ids):
+        self.offsets = offsets      # int64, length n + 1
+        self.neighbors = neighbors  # int32 dense indices, length 2m
+        self.ids = ids              # int64 original ids, sorted, length n
+        self.n = len(ids)
+        self.m = len(neighbors) // 2
+
+    # Build from parallel src/dst id sequences (one entry per edge) plus isolated nodes
+    @classmethod
+    def from_edges(cls, src, dst, nodes=()):
+        node_set = set(src)
+        node_set.update(dst)
+        node_set.update(nodes)
+        ids = array('q', sorted(node_set))
+        del node_set
+        n = len(ids)
+
+        # Ids that are already 0..n-1 need no renumbering. Other dense ids
+        # (the usual case for SNAP files) use a flat lookup table instead of a
+        # dict: 4 bytes per id instead of ~100.
+        if n and ids[0] == 0 and ids[-1] == n - 1:
+            lookup = None
+        elif n and ids[0] >= 0 and ids[-1] < 4 * n + 1024:
+            lookup = array('i', [-1]) * (ids[-1] + 1)
+            for idx, node in enumerate(ids):
+                lookup[node] = idx
+        else:
+            lookup = {node: idx for idx, node in enumerate(ids)}
+        if lookup is None:
+            src = array('i', src)
+            dst = array('i', dst)
+        else:
+            src = array('i', map(lookup.__getitem__, src))
+            dst = array('i', map(lookup.__getitem__, dst))
+        del lookup
+
+        # Counting sort of both edge directions into the neighbour array
+        degree = array('q', [0]) * (n + 1)
+        for u, v in zip(src, dst):
+            if u != v:
+                degree[u] += 1
+                degree[v] += 1
+        offsets = array('q', [0]) * (n + 1)
+        total = 0
+        for i in range(n):
+            offsets[i] = total
+            total += degree[i]
+        offsets[n] = total
+        fill = array('q', offsets[:n])
+        neighbors = array('i', [0]) * total
+        for u, v in zip(src, dst):
+            if u != v:
+                neighbors[fill[u]] = v
+                fill[u] += 1
+                neighbors[fill[v]] = u
+                fill[v] += 1
+        del src, dst, fill, degree
+
+        return cls._dedup(offsets, neighbors, ids)
+
+    @classmethod
+    def _dedup(cls, offsets, neighbors, ids):
+        # Drop parallel edges, keeping the first occurrence of each neighbour
+        n = len(ids)
+        if all(len(set(neighbors[offsets[i]:offsets[i + 1]])) == offsets[i + 1] - offsets[i]
+               for i in range(n)):
+            return cls(offsets, neighbors, ids)
+        new_offsets = array('q', [0]) * (n + 1)
+        new_neighbors = array('i')
+        for i in range(n):
+            new_offsets[i] = len(new_neighbors)
+            new_neighbors.extend(dict.fromkeys(neighbors[offsets[i]:offsets[i + 1]]))
+        new_offsets[n] = len(new_neighbors)
+        return cls(new_offsets, new_neighbors, ids)
+
+    # Dense index of a node id, -1 if it is not in the graph
+    def index_of(self, node):
+        i = bisect_left(self.ids, node)
+        if i < self.n and self.ids[i] == node:
+            return i
+        return -1
+
+    def node_of(self, idx):
+        return self.ids[idx]
+
+    def degree(self, idx):
+        return self.offsets[idx + 1] - self.offsets[idx]
+
+    def neighbors_of(self, idx):
+        return self.neighbors[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def __contains__(self, node):
+        return self.index_of(node) != -1
+
+
+#definition of Graph class...uNdirected
+# Edge-list builder, compiled into a CSRGraph on demand by csr()
+class Graph:
+
+    def __init__(self):
+        self.src = array('q')
+        self.dst = array('q')
+        self._csr = None
+
+    def add(self, a, b):
+        """
+        Add an undirected edge between nodes a and b.
+        """
+        self.src.append(a)
+        self.dst.append(b)
+        self._csr = None
+
+    def csr(self):
+        if self._csr is None:
+            self._csr = CSRGraph.from_edges(self.src, self.dst)
+        return self._csr
+
+
+# Accept either a Graph builder or a CSRGraph
+def as_csr(graph):
+    if isinstance(graph, Graph):
+        return graph.csr()
+    if isinstance(graph, GraphView):
+        raise TypeError("this analysis does not take a GraphView; pass view.csr for the whole graph")
+    return graph
+
+
+#Masked view: what-if removals without copying the graph
+# Removed vertices/edges are masked by generation stamps; reset() brings them all back in O(1)
+class GraphView:
+
+    def __init__(self, graph):
+        self.csr = as_csr(graph)
+        self.removed = array('I', [0]) * self.csr.n  # removed[v] == generation: v is gone
+        self.generation = 1
+        self.removed_nodes = []
+        self.cut = {}  # Vertex index -> indices of the neighbours whose edge is removed
+
+    def _index(self, node):
+        idx = self.csr.index_of(node)
+        if idx == -1:
+            raise KeyError(f"node {node} is not in the graph")
+        return idx
+
+    def remove_node(self, node):
+        idx = self._index(node)
+        if self.removed[idx] != self.generation:
+            self.removed[idx] = self.generation
+            self.removed_nodes.append(idx)
+
+    def remove_edge(self, u, v):
+        a, b = self._index(u), self._index(v)
+        if b not in self.csr.neighbors_of(a):
+            raise KeyError(f"edge ({u}, {v}) is not in the graph")
+        self.cut.setdefault(a, set()).add(b)
+        self.cut.setdefault(b, set()).add(a)
+
+    def is_removed(self, idx):
+        return self.removed[idx] == self.generation
+
+    def reset(self):
+        self.generation += 1
+        if self.generation == 1 << 32:
+            # Stamps are 32-bit: start over once in four billion resets
+            self.removed = array('I', [0]) * self.csr.n
+            self.generation = 1
+        self.removed_nodes = []
+        self.cut = {}
+
+
+def _unmask(graph):
+    # (underlying CSRGraph, the GraphView or None)
+    if isinstance(graph, GraphView):
+        return graph.csr, graph
+    return as_csr(graph), None
+
+
+# Count components with an optional vertex index and/or edge (index pair) left out
+def _count_components(graph, skip_node=-1, skip_edge=None, ram_cap=None):
+    csr, view = _unmask(graph)
+    offsets, neighbors = csr.offsets, csr.neighbors
+    workspace = Workspace(ram_cap)
+    visited = workspace.alloc('B', csr.n)
+    if skip_node >= 0:
+        visited[skip_node] = 1
+    cut = {}
+    if view is not None:
+        for v in view.removed_nodes:
+            visited[v] = 1
+        cut = view.cut
+    if skip_edge is not None and -1 not in skip_edge:
+        a, b = skip_edge
+        cut = {v: set(others) for v, others in cut.items()}  # The view's own set is left alone
+        cut.setdefault(a, set()).add(b)
+        cut.setdefault(b, set()).add(a)
+    component_count = 0
+    stack = workspace.alloc('i', csr.n)
+
+    for start in range(csr.n):
+        if visited[start]:
+            continue
+        component_count += 1
+        visited[start] = 1
+        stack[0] = start
+        top = 0
+        while top >= 0:
+            current = stack[top]
+            top -= 1
+            skip = cut.get(current) if cut else None
+            for neighbor in neighbors[offsets[current]:offsets[current + 1]]:
+                if visited[neighbor]:
+                    continue
+                if skip is not None and neighbor in skip:
+                    continue
+                visited[neighbor] = 1
+                top += 1
+                stack[top] = neighbor
+    return component_count
+
+
+# Count connected components after removing a specific node. Perform BFS/DFS on the modified graph excluding the removed node.
+def count_components_after_removal(graph, node_to_remove, ram_cap=None):
+    # A node that is not in the graph (e.g. -1) means "no removal"
+    csr, _ = _unmask(graph)
+    return _count_components(graph, skip_node=csr.index_of(node_to_remove), ram_cap=ram_cap)
+
+
+# Count connected components after removing bridge. Build new graph excluding the specified bridge and count components.
+
+def count_components_after_bridge_removal(graph, bridge, ram_cap=None):
+    csr, _ = _unmask(graph)
+    u, v = bridge
+    return _count_components(graph, skip_edge=(csr.index_of(u), csr.index_of(v)), ram_cap=ram_cap)
+
+
+# Label every vertex with its connected component (iterative DFS). Vertices
+# removed by a GraphView keep the label -1.
+def component_labels(graph, ram_cap=None):
+    csr, view = _unmask(graph)
+    offsets, neighbors = csr.offsets, csr.neighbors
+    workspace = Workspace(ram_cap)
+    labels = workspace.alloc('i', csr.n, -1)
+    stack = workspace.alloc('i', csr.n)
+    cut = None
+    if view is not None:
+        for v in view.removed_nodes:
+            labels[v] = -2
+        cut = view.cut or None
+    count = 0
+    for start in range(csr.n):
+        if labels[start] != -1:
+            continue
+        labels[start] = count
+        stack[0] = start
+        top = 0
+        while top >= 0:
+            current = stack[top]
+            top -= 1
+            skip = cut.get(current) if cut else None
+            for neighbor in neighbors[offsets[current]:offsets[current + 1]]:
+                if labels[neighbor] == -1 and (skip is None or neighbor not in skip):
+                    labels[neighbor] = count
+                    top += 1
+                    stack[top] = neighbor
+        count += 1
+    if view is not None:
+        for v in view.removed_nodes:
+            labels[v] = -1
+    return labels, count
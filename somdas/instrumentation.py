@@ -0,0 +1,235 @@
+#Per-phase timing, memory and live progress of a run
+from contextlib import contextmanager
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+try:
+    import resource  # Peak RSS for the instrumentation; not available on Windows
+except ImportError:
+    resource = None
+
+
+#Per-phase instrumentation: wall time, memory and optional profiling
+# Resident set size in bytes, None without /proc
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+# Largest resident set size so far in bytes, None if unknown
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+
+# Times each phase of a run (plus RSS, optional tracemalloc peak and cProfile dump) and
+# turns them into one JSON record
+class PhaseRecorder:
+
+    def __init__(self, run, script=None, trace_memory=False, profile_phase=None, profile_dir='.',
+                 progress=None):
+        self.run = run
+        self.script = script
+        self.progress = progress
+        self.trace_memory = trace_memory
+        self.profile_phase = profile_phase
+        self.profile_dir = profile_dir
+        self.phases = []
+        self.notes = {}
+        self.started = time.time()
+        self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        traced_before = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profiler = cProfile.Profile() if name == self.profile_phase else None
+        entry = {'name': name}
+        if self.progress is not None:
+            self.progress.start(name)
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield entry
+        finally:
+            if profiler:
+                profiler.disable()
+            entry['seconds'] = time.perf_counter() - start
+            entry['peak_traced_bytes'] = (tracemalloc.get_traced_memory()[1] - traced_before
+                                          if tracemalloc.is_tracing() else None)
+            entry['rss_bytes'] = current_rss()
+            entry['peak_rss_bytes'] = peak_rss()
+            if profiler:
+                base = os.path.basename(str(self.run))
+                entry['profile'] = os.path.join(self.profile_dir, f"{base}.{name}.prof")
+                profiler.dump_stats(entry['profile'])
+            self.phases.append(entry)
+
+    # Total time spent in phases called name
+    def seconds(self, name):
+        return sum(p['seconds'] for p in self.phases if p['name'] == name)
+
+    # Attach extra values to the record
+    def note(self, **values):
+        self.notes.update(values)
+
+    def record(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return {
+            'run': self.run,
+            'script': self.script,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'total_seconds': sum(p['seconds'] for p in self.phases),
+            'phases': self.phases,
+            'notes': self.notes,
+        }
+
+    # Append the record to a JSON Lines file and return it
+    def write(self, path):
+        record = self.record()
+        append_metrics(path, record)
+        return record
+
+
+def append_metrics(path, record):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+#Live progress: items, throughput, ETA, RSS and phase in a Prometheus textfile
+PROGRESS_METRICS = (
+    ('somdas_running', "1 while the run is going, 0 once it has finished."),
+    ('somdas_items_processed', "Items finished in the current phase."),
+    ('somdas_items_total', "Items the current phase will process, when known."),
+    ('somdas_items_per_second', "Recent throughput of the current phase (smoothed)."),
+    ('somdas_eta_seconds', "Estimated time left in the current phase at that throughput."),
+    ('somdas_phase_elapsed_seconds', "Time spent in the current phase."),
+    ('somdas_run_elapsed_seconds', "Time since the run started."),
+    ('somdas_rss_bytes', "Resident set size of the process."),
+    ('somdas_peak_rss_bytes', "Largest resident set size of the process so far."),
+    ('somdas_last_update_timestamp_seconds', "Unix time of this update."),
+)
+
+
+# Live progress (phase, items, rate, ETA, RSS) rewritten every interval seconds as a Prometheus
+# textfile. tick() only counts; the clock is read about every check_seconds
+class ProgressReporter:
+
+    def __init__(self, path=None, run=None, script=None, interval=5.0, check_seconds=0.25):
+        self.path = path
+        self.labels = {'script': script or '', 'run': os.path.basename(str(run)) if run else ''}
+        self.interval = interval
+        self.check_seconds = check_seconds
+        self.started = time.perf_counter()
+        self.running = 1
+        self._last_write = float('-inf')
+        self.start(None)
+
+    # Begin a new phase; total is the number of items, if known
+    def start(self, phase, total=None):
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self.rate = 0.0
+        self.phase_started = self._window_start = time.perf_counter()
+        self._window_done = 0
+        self._stride = self._check_at = 1
+        if phase is not None:
+            self.write()
+
+    # Set the number of items of the current phase
+    def expect(self, total):
+        self.total = total
+
+    def tick(self, count=1):
+        self.done += count
+        if self.done >= self._check_at:
+            self._check()
+
+    def _check(self):
+        now = time.perf_counter()
+        window = now - self._window_start
+        if window >= self.check_seconds:
+            rate = (self.done - self._window_done) / window
+            self.rate = rate if not self.rate else 0.7 * self.rate + 0.3 * rate  # Smoothed
+            self._stride = max(1, int(self.rate * self.check_seconds))
+            self._window_start, self._window_done = now, self.done
+        if now - self._last_write >= self.interval:
+            self.write(now)
+        self._check_at = self.done + self._stride
+
+    # Current values by metric name (None where unknown)
+    def snapshot(self, now=None):
+        now = now or time.perf_counter()
+        eta = None
+        if self.total is not None and self.rate > 0:
+            eta = max(0, self.total - self.done) / self.rate
+        return {
+            'somdas_running': self.running,
+            'somdas_items_processed': self.done,
+            'somdas_items_total': self.total,
+            'somdas_items_per_second': self.rate,
+            'somdas_eta_seconds': eta,
+            'somdas_phase_elapsed_seconds': now - self.phase_started,
+            'somdas_run_elapsed_seconds': now - self.started,
+            'somdas_rss_bytes': current_rss(),
+            'somdas_peak_rss_bytes': peak_rss(),
+            'somdas_last_update_timestamp_seconds': time.time(),
+        }
+
+    # Prometheus text format of snapshot()
+    def render(self, now=None):
+        values = self.snapshot(now)
+        labels = dict(self.labels, phase=self.phase or '')
+        label_text = ','.join(f'{key}="{value}"' for key, value in
+                              ((key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                               for key, value in labels.items()))
+        lines = []
+        for name, help_text in PROGRESS_METRICS:
+            value = values[name]
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{{{label_text}}} {value:.6f}" if isinstance(value, float)
+                         else f"{name}{{{label_text}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, now=None):
+        now = now or time.perf_counter()
+        self._last_write = now
+        if self.path is None:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                f.write(self.render(now))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # A monitoring file that cannot be written must not stop the analysis
+
+    # Final update, marking the run as finished
+    def close(self):
+        self.running = 0
+        self.write()
@@ -0,0 +1,373 @@
+#Edge-list loading with the CSR cache, and the persistent result cache
+from array import array
+from bisect import bisect_left
+import bz2
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import pickle
+import tempfile
+from somdas.storage import map_array_bundle, write_array_bundle, write_array_bundle_files
+from somdas.graph import as_csr, CSRGraph
+
+
+#Graph loading with a binary CSR cache next to the edge list
+GRAPH_CACHE_SUFFIX = '.csr'
+GRAPH_CACHE_VERSION = 1
+
+
+# blake2b digest of a file's contents
+def file_digest(filename):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Edge-list formats found in the datasets:
+#   SNAP         '#' comment header, then "u<TAB>v" lines      (as20000102.txt)
+#   bare pairs   "u v" lines only                             (power_grid_uci.txt)
+#   MatrixMarket '%%MatrixMarket ...' banner ('##' in our copy), comments,
+#                a "rows cols entries" size line, then "i j [value]" lines (power-US-Grid.txt)
+# Files may be gzip or bzip2 compressed; this is detected from the magic bytes.
+EDGE_CHUNK_SIZE = 1 << 23
+COMMENT_CHARS = '#%'
+
+
+# Open a possibly gzip/bz2-compressed text file
+def open_text(filename):
+    with open(filename, 'rb') as f:
+        magic = f.read(3)
+    if magic[:2] == b'\x1f\x8b':
+        return gzip.open(filename, 'rt')
+    if magic == b'BZh':
+        return bz2.open(filename, 'rt')
+    return open(filename, 'r')
+
+
+def _detect_layout(file):
+    # Read up to the first data line: returns (first data line, columns) with
+    # the MatrixMarket size line already consumed.
+    banner = file.readline()
+    line = banner
+    matrix_market = banner[2:14].lower() == 'matrixmarket'
+    pattern = matrix_market and 'pattern' in banner.lower()
+    while line and (not line.strip() or line[0] in COMMENT_CHARS):
+        line = file.readline()
+    # The size line is always the first line after the comments, unless it was
+    # commented out (as in our copy): for pattern matrices, whose entries have
+    # two columns, a three-column first line can only be the size line.
+    if matrix_market and line and (not pattern or len(line.split()) == 3):
+        line = file.readline()
+    return line, len(line.split())
+
+
+# Yield (src, dst) id arrays about chunk_size bytes of input at a time, converted in bulk
+# unless the chunk has comments or ragged lines
+def iter_edge_chunks(filename, chunk_size=EDGE_CHUNK_SIZE):
+    with open_text(filename) as file:
+        first, columns = _detect_layout(file)
+        if columns < 2:
+            return
+        carry = first
+        while True:
+            data = file.read(chunk_size)
+            block = carry + data
+            if not block:
+                return
+            if data:
+                # Keep the partial last line for the next chunk
+                cut = block.rfind('\n') + 1
+                if not cut:
+                    carry = block
+                    continue
+                block, carry = block[:cut], block[cut:]
+            else:
+                carry = ''
+            tokens = block.split()
+            lines = block.count('\n') + (not block.endswith('\n'))
+            if len(tokens) == lines * columns and not any(c in block for c in COMMENT_CHARS):
+                values = array('q', map(int, tokens[0::columns] + tokens[1::columns]))
+                half = len(values) // 2
+                yield values[:half], values[half:]
+            else:
+                src, dst = array('q'), array('q')
+                for line in block.splitlines():
+                    parts = line.split()
+                    if len(parts) < 2 or line[0] in COMMENT_CHARS:
+                        continue
+                    src.append(int(parts[0]))
+                    dst.append(int(parts[1]))
+                yield src, dst
+            if not data:
+                return
+
+
+# Parse an edge list in any of the formats above into a CSRGraph
+def parse_edge_list(filename):
+    src, dst = array('q'), array('q')
+    for chunk_src, chunk_dst in iter_edge_chunks(filename):
+        src.extend(chunk_src)
+        dst.extend(chunk_dst)
+    return CSRGraph.from_edges(src, dst)
+
+
+# Out-of-core CSR construction: each directed edge (u, v) is the key u << 32 | v (plus (u, u)
+# for every endpoint), sorted in runs that fit the cap and merged from disk
+EXTERNAL_KEY_BITS = 32
+EXTERNAL_BLOCK = 1 << 16  # Items per read/write of the run and scratch files
+EXTERNAL_KEY_BYTES = 48  # Memory per key while a run is sorted (list slot plus int object)
+
+
+def _spill_run(keys, directory):
+    keys.sort()
+    run = tempfile.TemporaryFile(dir=directory)
+    array('Q', keys).tofile(run)
+    run.seek(0)
+    return run
+
+
+def _iter_file(file, typecode):
+    file.seek(0)
+    while True:
+        block = array(typecode)
+        try:
+            block.fromfile(file, EXTERNAL_BLOCK)
+        except EOFError:
+            pass  # Short last block: the items read are kept
+        if not block:
+            return
+        yield from block
+
+
+# Build the CSR bundle at path by external merge sort, holding about ram_cap bytes of edges
+# in memory. Node ids must lie in [0, 2**32). Returns (nodes, edges)
+def build_csr_external(filename, path, ram_cap, meta=None, directory=None):
+    directory = directory or os.path.dirname(os.path.abspath(path))
+    limit = 1 << EXTERNAL_KEY_BITS
+    run_keys = max(1 << 16, ram_cap // EXTERNAL_KEY_BYTES)
+    chunk_size = max(1 << 16, min(EDGE_CHUNK_SIZE, ram_cap // 8))
+    runs = []
+    keys = []
+    try:
+        for src, dst in iter_edge_chunks(filename, chunk_size):
+            if src and (min(src) < 0 or min(dst) < 0 or max(src) >= limit or max(dst) >= limit):
+                raise ValueError(f"{filename}: node ids must lie in [0, 2**{EXTERNAL_KEY_BITS}) "
+                                 f"for the out-of-core build")
+            for u, v in zip(src, dst):
+                keys.append(u << EXTERNAL_KEY_BITS | v)
+                keys.append(v << EXTERNAL_KEY_BITS | u)
+                keys.append(u << EXTERNAL_KEY_BITS | u)
+                keys.append(v << EXTERNAL_KEY_BITS | v)
+            if len(keys) >= run_keys:
+                runs.append(_spill_run(keys, directory))
+                keys = []
+        if keys or not runs:
+            runs.append(_spill_run(keys, directory))
+        del keys
+
+        # Pass 1: merge the runs, dropping repeats, into the sorted ids, the
+        # offsets and the neighbours as original ids
+        ids_file = tempfile.TemporaryFile(dir=directory)
+        offsets_file = tempfile.TemporaryFile(dir=directory)
+        targets_file = tempfile.TemporaryFile(dir=directory)
+        ids, offsets, targets = array('q'), array('q'), array('q')
+        mask = limit - 1
+        n = total = 0
+        previous = current = -1
+        for key in heapq.merge(*(_iter_file(run, 'Q') for run in runs)):
+            if key == previous:
+                continue
+            previous = key
+            u = key >> EXTERNAL_KEY_BITS
+            if u != current:
+                current = u
+                ids.append(u)
+                offsets.append(total)
+                n += 1
+                if len(ids) >= EXTERNAL_BLOCK:
+                    ids.tofile(ids_file)
+                    offsets.tofile(offsets_file)
+                    del ids[:], offsets[:]
+            v = key & mask
+            if v != u:
+                targets.append(v)
+                total += 1
+                if len(targets) >= EXTERNAL_BLOCK:
+                    targets.tofile(targets_file)
+                    del targets[:]
+        offsets.append(total)
+        ids.tofile(ids_file)
+        offsets.tofile(offsets_file)
+        targets.tofile(targets_file)
+        for run in runs:
+            run.close()
+        runs = []
+
+        # Pass 2: neighbours to dense indices. Ids 0..n-1 map to themselves,
+        # a lookup table is used when it fits the cap, and a binary search
+        # over the memory-mapped ids otherwise.
+        ids_file.flush()
+        id_map = mmap.mmap(ids_file.fileno(), max(n * 8, 1), access=mmap.ACCESS_READ)
+        sorted_ids = memoryview(id_map)[:n * 8].cast('q')
+        if n == 0 or (sorted_ids[0] == 0 and sorted_ids[n - 1] == n - 1):
+            dense = None
+        elif (sorted_ids[n - 1] + 1) * 4 <= ram_cap:
+            dense = array('i', [-1]) * (sorted_ids[n - 1] + 1)
+            for idx, node in enumerate(sorted_ids):
+                dense[node] = idx
+            dense = dense.__getitem__
+        else:
+            dense = lambda node: bisect_left(sorted_ids, node)
+        neighbors_file = tempfile.TemporaryFile(dir=directory)
+        block = array('i')
+        for v in _iter_file(targets_file, 'q'):
+            block.append(v if dense is None else dense(v))
+            if len(block) >= EXTERNAL_BLOCK:
+                block.tofile(neighbors_file)
+                del block[:]
+        block.tofile(neighbors_file)
+        del dense
+        sorted_ids.release()
+        id_map.close()
+        targets_file.close()
+
+        meta = dict(meta or {}, nodes=n, edges=total // 2)
+        write_array_bundle_files(path, {'offsets': ('q', n + 1, offsets_file),
+                                        'neighbors': ('i', total, neighbors_file),
+                                        'ids': ('q', n, ids_file)}, meta)
+        for scratch in (ids_file, offsets_file, neighbors_file):
+            scratch.close()
+        return n, total // 2
+    finally:
+        for run in runs:
+            run.close()
+
+
+# Load an edge list as a CSRGraph, through a filename + '.csr' bundle that is mapped instead of
+# parsing while the file is unchanged. With ram_cap the bundle is built on disk
+def load_graph(filename, use_cache=True, ram_cap=None):
+    cache = filename + GRAPH_CACHE_SUFFIX
+    stat = os.stat(filename)
+    use_cache = use_cache or ram_cap is not None
+    if use_cache and os.path.exists(cache):
+        try:
+            meta, views = map_array_bundle(cache)
+            if (meta.get('version') == GRAPH_CACHE_VERSION and meta['size'] == stat.st_size and
+                    (meta['mtime_ns'] == stat.st_mtime_ns or meta['digest'] == file_digest(filename))):
+                return CSRGraph(views['offsets'], views['neighbors'], views['ids'])
+        except (ValueError, KeyError, OSError):
+            pass  # Unreadable or stale cache: rebuild it below
+
+    if ram_cap is not None:
+        meta = {'version': GRAPH_CACHE_VERSION, 'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns, 'digest': file_digest(filename)}
+        try:
+            build_csr_external(filename, cache + '.tmp', ram_cap, meta)
+            os.replace(cache + '.tmp', cache)
+        finally:
+            if os.path.exists(cache + '.tmp'):
+                os.remove(cache + '.tmp')
+        meta, views = map_array_bundle(cache)
+        return CSRGraph(views['offsets'], views['neighbors'], views['ids'])
+
+    csr = parse_edge_list(filename)
+    if use_cache:
+        meta = {'version': GRAPH_CACHE_VERSION, 'nodes': csr.n, 'edges': csr.m,
+                'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': file_digest(filename)}
+        try:
+            # Write under a temporary name so a half-written cache is never mapped
+            write_array_bundle(cache + '.tmp', {'offsets': csr.offsets, 'neighbors': csr.neighbors,
+                                                'ids': csr.ids}, meta)
+            os.replace(cache + '.tmp', cache)
+        except OSError:
+            pass
+    return csr
+
+
+#Persistent result cache keyed by graph content and analysis parameters
+RESULT_CACHE_VERSION = 1  # Bump when an analysis changes what it returns
+RESULT_CACHE_LIMIT = 1 << 30  # Bytes kept on disk before the least recently used entries go
+
+
+# Digest of a graph's CSR arrays: equal for equal graphs however they were loaded
+def graph_digest(graph):
+    csr = as_csr(graph)
+    digest = hashlib.blake2b(digest_size=16)
+    for data in (csr.offsets, csr.neighbors, csr.ids):
+        digest.update(memoryview(data).cast('B'))
+    return digest.hexdigest()
+
+
+# Analysis results pickled under directory, keyed by graph digest, kind and parameters.
+# Least recently used entries go once the folder passes max_bytes
+class ResultCache:
+
+    def __init__(self, directory='.somdas_cache', max_bytes=RESULT_CACHE_LIMIT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(digest, kind, **params):
+        text = json.dumps([RESULT_CACHE_VERSION, digest, kind, params], sort_keys=True)
+        return f"{kind}-{hashlib.blake2b(text.encode(), digest_size=16).hexdigest()}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+        self.evict()
+
+    # The cached value for key, or compute() stored under it
+    def cached(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
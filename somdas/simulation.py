@@ -0,0 +1,838 @@
+#Failure simulations: multi-point removals, targeted attacks, resilience curves
+from collections import Counter, defaultdict, deque
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import math
+import random
+import statistics
+from somdas.storage import map_array_bundle, shared_bundle
+from somdas.graph import as_csr, CSRGraph
+from somdas.tarjan import dfs_lowpoints
+
+
+#Multi-point failures without copying the graph
+# Component count after deleting a set of vertices, for many sets in a row, from the
+# block-cut tree: components(G - S) = components(G) + sum over v in S of (blocks(v) - 1)
+# + sum over blocks B of (pieces(B - S) - 1). Only blocks with two or more deleted
+# vertices are searched, which is not local when that block is large (see _block_pieces)
+class MultiRemovalSimulator:
+
+    def __init__(self, graph, structure=None):
+        self.csr = csr = as_csr(graph)
+        n = csr.n
+        if structure is None:
+            structure = self._build_structure(csr)
+        # May be arrays or read-only views of a shared mapping (see structure())
+        self.parent = structure['parent']
+        self.block_of = structure['block_of']
+        self.head_offsets = structure['head_offsets']
+        self.heads = structure['heads']
+        self.components = structure['components']
+
+        self.removed = array('I', [0]) * n
+        self.seen = array('I', [0]) * n
+        self.owner = array('i', [-1]) * n
+        self.trial = 0
+        self.epoch = 0
+
+    @staticmethod
+    def _build_structure(csr):
+        n = csr.n
+        order, parent, disc, low = dfs_lowpoints(csr)
+        components = 0
+
+        # block_of[v]: the block holding v and its DFS parent, named by its
+        # head (the topmost child vertex of the block); -1 for DFS roots.
+        # Blocks headed by children of v are the other blocks containing v.
+        block_of = array('i', [-1]) * n
+        head_count = array('q', [0]) * (n + 1)
+        for v in order:
+            p = parent[v]
+            if p == -1:
+                components += 1
+            elif low[v] >= disc[p]:
+                block_of[v] = v
+                head_count[p] += 1
+            else:
+                block_of[v] = block_of[p]
+        head_offsets = array('q', [0]) * (n + 1)
+        total = 0
+        for v in range(n):
+            head_offsets[v] = total
+            total += head_count[v]
+        head_offsets[n] = total
+        fill = array('q', head_offsets[:n])
+        heads = array('i', [0]) * total
+        for v in order:
+            if block_of[v] == v:
+                p = parent[v]
+                heads[fill[p]] = v
+                fill[p] += 1
+        return {'parent': parent, 'block_of': block_of, 'head_offsets': head_offsets,
+                'heads': heads, 'components': components}
+
+    # The block-cut tree arrays, to hand to another process
+    def structure(self):
+        return {'parent': self.parent, 'block_of': self.block_of,
+                'head_offsets': self.head_offsets, 'heads': self.heads,
+                'components': self.components}
+
+    # Heads of all blocks containing vertex v
+    def blocks_of(self, v):
+        blocks = list(self.heads[self.head_offsets[v]:self.head_offsets[v + 1]])
+        if self.block_of[v] != -1:
+            blocks.append(self.block_of[v])
+        return blocks
+
+    # Component count once the vertex indices in removed are deleted
+    def components_without(self, removed):
+        self.trial += 1
+        t = self.trial
+        mark = self.removed
+        for v in removed:
+            mark[v] = t
+
+        fragments = self.components
+        hit = {}
+        for v in removed:
+            blocks = self.blocks_of(v)
+            fragments += len(blocks) - 1
+            for h in blocks:
+                hit.setdefault(h, []).append(v)
+        for h, members in hit.items():
+            if len(members) > 1:
+                fragments += self._block_pieces(h, members) - 1
+        return fragments
+
+    def _block_pieces(self, h, members):
+        # Number of pieces block h falls into once the vertices in members
+        # (all marked in self.removed for the current trial) are deleted.
+        # Searches start at their neighbours and stop once only one is growing,
+        # so a split-off piece costs about its size; but searches that do not
+        # split apart have to meet first, which in a big block (the power grid's
+        # main one) walks most of it: about a third of a full recount per trial
+        offsets, neighbors = self.csr.offsets, self.csr.neighbors
+        block_of, mark, seen, owner = self.block_of, self.removed, self.seen, self.owner
+        top = self.parent[h]
+        t = self.trial
+        self.epoch += 1
+        e = self.epoch
+
+        uf = []
+        frontier = []
+        for v in members:
+            for w in neighbors[offsets[v]:offsets[v + 1]]:
+                if mark[w] != t and seen[w] != e and (block_of[w] == h or w == top):
+                    seen[w] = e
+                    owner[w] = len(uf)
+                    uf.append(len(uf))
+                    frontier.append([w])
+        pieces = active = len(uf)
+
+        live = list(range(len(uf)))
+        while active > 1:
+            still_live = []
+            for k in live:
+                if uf[k] != k:
+                    continue
+                f = frontier[k]
+                if not f:
+                    # Search exhausted: its piece is complete
+                    active -= 1
+                    if active == 1:
+                        break
+                    continue
+                x = f.pop()
+                for w in neighbors[offsets[x]:offsets[x + 1]]:
+                    if mark[w] == t or (block_of[w] != h and w != top):
+                        continue
+                    if seen[w] != e:
+                        seen[w] = e
+                        owner[w] = k
+                        f.append(w)
+                        continue
+                    j = owner[w]
+                    while uf[j] != j:
+                        uf[j] = uf[uf[j]]
+                        j = uf[j]
+                    if j == k:
+                        continue
+                    # Two searches met: same piece
+                    uf[j] = k
+                    fj = frontier[j]
+                    frontier[j] = None
+                    if len(fj) > len(f):
+                        fj.extend(f)
+                        f = frontier[k] = fj
+                    else:
+                        f.extend(fj)
+                    pieces -= 1
+                    active -= 1
+                if active == 1:
+                    break
+                still_live.append(k)
+            live = still_live
+
+        return pieces
+
+
+#Streaming statistics of Monte Carlo trials, with a precision target
+# Welford mean/variance, min, max and a histogram for quantiles; merge() is exact
+class TrialStats:
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.lowest = None
+        self.highest = None
+        self.histogram = Counter()
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.lowest is None or value < self.lowest:
+            self.lowest = value
+        if self.highest is None or value > self.highest:
+            self.highest = value
+        self.histogram[value] += 1
+
+    def merge(self, other):
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.lowest = other.lowest if self.lowest is None else min(self.lowest, other.lowest)
+        self.highest = other.highest if self.highest is None else max(self.highest, other.highest)
+        self.histogram.update(other.histogram)
+
+    def stdev(self):
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    # Half-width of the normal confidence interval of the mean
+    def half_width(self, confidence=0.95):
+        if self.count < 2:
+            return float('inf')
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * self.stdev() / self.count ** 0.5
+
+    # Smallest outcome with at least a fraction q of the trials at or below it
+    def quantile(self, q):
+        need = max(1, math.ceil(q * self.count))
+        seen = 0
+        for value in sorted(self.histogram):
+            seen += self.histogram[value]
+            if seen >= need:
+                return value
+        return self.highest
+
+    # Stop once there are min_trials, the CI is within +-precision of the mean and enough
+    # trials lie beyond the tail quantile to estimate it
+    def precise_enough(self, precision, confidence=0.95, tail=0.99, min_trials=1000, tail_trials=20):
+        if self.count < max(min_trials, tail_trials / (1 - tail)):
+            return False
+        return self.half_width(confidence) <= precision * (abs(self.mean) or 1)
+
+
+# Worker state for the simulation pool: the graph, its block-cut tree and the
+# candidate vertices are mapped from one bundle file per worker, never pickled
+_worker_simulator = None
+_worker_candidates = None
+
+
+def _init_simulation_worker(path):
+    global _worker_simulator, _worker_candidates
+    meta, views = map_array_bundle(path)
+    csr = CSRGraph(views['offsets'], views['neighbors'], views['ids'])
+    structure = {name: views[name] for name in ('parent', 'block_of', 'head_offsets', 'heads')}
+    structure['components'] = meta['components']
+    _worker_simulator = MultiRemovalSimulator(csr, structure)
+    _worker_candidates = list(views['candidates'])
+
+
+def _simulate_chunk(seed, chunk, trials, k, simulator=None, candidates=None):
+    # Each chunk draws from its own stream, so results only depend on the seed
+    simulator = simulator or _worker_simulator
+    candidates = candidates if candidates is not None else _worker_candidates
+    rng = random.Random(f"{seed}:{chunk}")
+    stats = TrialStats()
+    for _ in range(trials):
+        stats.add(simulator.components_without(rng.sample(candidates, k)))
+    return stats
+
+
+# Result dict of a multi-removal simulation
+def trial_summary(stats, confidence=0.95, tail=0.99, stopped_early=False):
+    low = stats.mean - stats.half_width(confidence)
+    high = stats.mean + stats.half_width(confidence)
+    return {
+        "trials": stats.count,
+        "avg_fragments": stats.mean,
+        "max_fragments": stats.highest,
+        "min_fragments": stats.lowest,
+        "stdev_fragments": stats.stdev(),
+        "confidence": confidence,
+        "ci_low": low,
+        "ci_high": high,
+        "median_fragments": stats.quantile(0.5),
+        "tail": tail,
+        "tail_fragments": stats.quantile(tail),
+        "stopped_early": stopped_early,
+    }
+
+
+# Monte Carlo of k simultaneous failures. Chunk i draws from Random(f"{seed}:{i}") and chunks
+# are folded in order, so results and the early stop depend only on the seed
+def simulate_multi_removal(graph, candidates, num_trials, k, seed, workers=1,
+                           chunk_size=1000, simulator=None, precision=None, confidence=0.95, tail=0.99,
+                           progress=None):
+    if num_trials <= 0:
+        return None
+    simulator = simulator or MultiRemovalSimulator(graph)
+    candidates = list(candidates)
+    chunks = [(seed, i, min(chunk_size, num_trials - start), k)
+              for i, start in enumerate(range(0, num_trials, chunk_size))]
+    stats = TrialStats()
+    stopped_early = False
+
+    def fold(chunk_stats):
+        # True once the precision target is met
+        stats.merge(chunk_stats)
+        if progress is not None:
+            progress.tick(chunk_stats.count)
+        return precision is not None and stats.precise_enough(precision, confidence, tail)
+
+    if workers <= 1:
+        for i, chunk in enumerate(chunks):
+            if fold(_simulate_chunk(*chunk, simulator=simulator, candidates=candidates)):
+                stopped_early = i < len(chunks) - 1
+                break
+    else:
+        csr = simulator.csr
+        structure = simulator.structure()
+        arrays = {'offsets': csr.offsets, 'neighbors': csr.neighbors, 'ids': csr.ids,
+                  'candidates': array('i', candidates)}
+        for name in ('parent', 'block_of', 'head_offsets', 'heads'):
+            arrays[name] = structure[name]
+        with shared_bundle(arrays, {'components': structure['components']}) as path:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_simulation_worker,
+                                     initargs=(path,)) as pool:
+                # A few chunks per worker in flight, so little is computed past the stopping point
+                pending = iter(chunks)
+                futures = deque(pool.submit(_simulate_chunk, *chunk) for _, chunk in zip(range(2 * workers), pending))
+                for i in range(len(chunks)):
+                    if fold(futures.popleft().result()):
+                        stopped_early = i < len(chunks) - 1
+                        break
+                    chunk = next(pending, None)
+                    if chunk is not None:
+                        futures.append(pool.submit(_simulate_chunk, *chunk))
+                for future in futures:
+                    future.cancel()
+
+    return trial_summary(stats, confidence, tail, stopped_early)
+
+
+#Greedy targeted attack: always remove the currently most damaging AP
+TARGETED_OBJECTIVES = ('fragments', 'lcc')
+
+
+# Greedy adversary: repeatedly delete the AP doing the most damage right now, by new
+# components ('fragments') or drop of the largest component ('lcc'). Only the blocks holding
+# the deleted vertex are searched again, and subtree sizes are fixed on the path to the root.
+# 'fragments' keeps a lazy heap of APs, re-pushing those whose block count changed; 'lcc'
+# follows the heavy path of the largest component's block-cut tree
+class TargetedAttack:
+
+    def __init__(self, graph, objective='fragments'):
+        if objective not in TARGETED_OBJECTIVES:
+            raise ValueError(f"objective must be one of {TARGETED_OBJECTIVES}")
+        self.csr = csr = as_csr(graph)
+        self.objective = objective
+        n = csr.n
+        self.removed = bytearray(n)
+        self.stamp = array('i', [0]) * n
+        self.heap = []
+
+        # Scratch arrays of the block searches, valid where seen == epoch
+        self.mark = array('Q', [0]) * n
+        self.disc = array('i', [0]) * n
+        self.parent = array('i', [0]) * n
+        self.low = array('i', [0]) * n
+        self.pos = array('q', [0]) * n
+        self.vertex_mark = array('i', [0]) * n
+        self.epoch = 0
+
+        self.blocks = {}     # block id -> dense vertex indices
+        self.ap_blocks = {}  # AP -> ids of its blocks; other vertices sit in exactly one block
+        self.next_block = 0
+        # Block-cut tree of every component, rooted at one of its blocks
+        self.via = {}    # block -> the AP above it, -1 for a root block
+        self.below = {}  # block -> vertices in its subtree, via excluded
+        self.up = {}     # AP -> the block above it
+        self.down = {}   # AP -> vertices in its subtree, itself excluded
+        # lcc objective only: lazy heaps of the heaviest child of every block
+        # and AP, and of the component roots by size
+        self.heavy_aps = {}
+        self.heavy_blocks = {}
+        self.roots = []
+        self.sizes = Counter()  # Component size -> how many components have it
+        self.changed = set()
+        roots = self._hang(self._add_blocks(self._blocks_within(range(n))), -1)
+        for r in roots:
+            self.sizes[self.below[r]] += 1
+        self.components = len(roots)
+        if objective == 'fragments':
+            for w in self.ap_blocks:
+                self._push(w)
+        self.changed.clear()
+
+    def _blocks_within(self, vertices):
+        # Blocks of the subgraph induced by vertices, as lists ending with the
+        # vertex that separates the block from the DFS parent side; a vertex
+        # with no neighbour among them is a block of its own.
+        # mark[w] == 2 * epoch: w is inside and not reached yet, 2 * epoch + 1:
+        # reached, anything smaller: outside
+        self.epoch += 1
+        fresh = 2 * self.epoch
+        offsets, neighbors = self.csr.offsets, self.csr.neighbors
+        mark, disc, low, pos, parent = self.mark, self.disc, self.low, self.pos, self.parent
+        vertex_mark = self.vertex_mark
+        for w in vertices:
+            mark[w] = fresh
+        blocks = []
+        stack = []
+        vertex_stack = []
+        t = 0
+        for root in vertices:
+            if mark[root] != fresh:
+                continue
+            mark[root] = fresh + 1
+            disc[root] = low[root] = t
+            t += 1
+            pos[root] = offsets[root]
+            parent[root] = -1
+            stack.append(root)
+            while stack:
+                u = stack[-1]
+                low_u = low[u]
+                i, end = pos[u], offsets[u + 1]
+                descended = False
+                while i < end:
+                    w = neighbors[i]
+                    i += 1
+                    state = mark[w]
+                    if state == fresh:
+                        mark[w] = fresh + 1
+                        disc[w] = low[w] = t
+                        t += 1
+                        pos[w] = offsets[w]
+                        parent[w] = u
+                        vertex_mark[w] = len(vertex_stack)
+                        vertex_stack.append(w)
+                        stack.append(w)
+                        descended = True
+                        break
+                    # The tree edge back to the parent is counted too: that
+                    # leaves the block test low[u] >= disc[parent] unchanged
+                    if state > fresh and disc[w] < low_u:
+                        low_u = disc[w]
+                low[u] = low_u
+                pos[u] = i
+                if descended:
+                    continue
+                stack.pop()
+                pu = parent[u]
+                if pu == -1:
+                    if t == disc[root] + 1:
+                        blocks.append([root])
+                    continue
+                if low_u < low[pu]:
+                    low[pu] = low_u
+                if low_u >= disc[pu]:
+                    block = vertex_stack[vertex_mark[u]:]
+                    del vertex_stack[vertex_mark[u]:]
+                    block.append(pu)
+                    blocks.append(block)
+        return blocks
+
+    def _add_blocks(self, new_blocks, replaced=None):
+        # Register new blocks; replaced is the block id they came from, which
+        # every vertex in them leaves. Returns the new ids. A vertex in two or
+        # more of the new blocks ends at least one of them, so only those
+        # last vertices (and the APs already known) are looked up. APs whose
+        # block count changed are added to self.changed.
+        ids = []
+        for block in new_blocks:
+            self.blocks[self.next_block] = block
+            ids.append(self.next_block)
+            self.next_block += 1
+        ap_blocks = self.ap_blocks
+        candidates = {block[-1] for block in new_blocks}
+        joined = defaultdict(list)
+        for b, block in zip(ids, new_blocks):
+            for w in candidates.intersection(block) | (ap_blocks.keys() & block if len(block) > 1 else set()):
+                joined[w].append(b)
+        for w, bs in joined.items():
+            if w in ap_blocks:
+                ap_blocks[w].discard(replaced)
+                ap_blocks[w].update(bs)
+                if len(bs) > 1:
+                    self.changed.add(w)
+            elif len(bs) > 1:
+                ap_blocks[w] = set(bs)
+                self.changed.add(w)
+        return ids
+
+    def _hang(self, ids, top):
+        # Root the new blocks ids below AP top (each new block holding top hangs
+        # from it), or at a new root block per component when top is -1. Older
+        # blocks hanging off their APs keep their via and below. Returns the roots
+        blocks, ap_blocks, via, below, up, down = self.blocks, self.ap_blocks, self.via, self.below, self.up, self.down
+        lcc = self.objective == 'lcc'
+        new = set(ids)
+        order = []
+        roots = []
+        for s in (ids if top == -1 else [b for b in ids if top in blocks[b]]):
+            if s in via:
+                continue
+            via[s] = top
+            if top == -1:
+                roots.append(s)
+            k = len(order)
+            order.append(s)
+            while k < len(order):
+                b = order[k]
+                k += 1
+                x = via[b]
+                for w in blocks[b]:
+                    if w == x or w not in ap_blocks:
+                        continue
+                    up[w] = b
+                    for c in ap_blocks[w]:
+                        if c in new and c not in via:
+                            via[c] = w
+                            order.append(c)
+        for b in reversed(order):
+            x = via[b]
+            count = 0
+            aps = []
+            for w in blocks[b]:
+                if w == x:
+                    continue
+                count += 1
+                if w in ap_blocks:
+                    children = [(-below[c], c) for c in ap_blocks[w] if c != b]
+                    down[w] = d = -sum(size for size, _ in children)
+                    count += d
+                    if lcc:
+                        heapq.heapify(children)
+                        self.heavy_blocks[w] = children
+                        aps.append((-d - 1, w))
+            below[b] = count
+            if lcc:
+                heapq.heapify(aps)
+                self.heavy_aps[b] = aps
+        for r in roots:
+            self._push_root(r)
+        return roots
+
+    def _push(self, w):
+        # Fresh heap entry for AP w (fragments objective)
+        self.stamp[w] += 1
+        heapq.heappush(self.heap, ((1 - len(self.ap_blocks[w]),), w, self.stamp[w]))
+
+    def _push_root(self, r):
+        if self.objective == 'lcc':
+            heapq.heappush(self.roots, (-self.below[r], r))
+
+    def _shrink(self, b, a, delta):
+        # Block b lost delta vertices under its child AP a (-1 when a is no AP
+        # any more): fix the sizes on the path to the root and return the root
+        via, below, up, down = self.via, self.below, self.up, self.down
+        lcc = self.objective == 'lcc'
+        while True:
+            below[b] -= delta
+            if lcc and a != -1:
+                heapq.heappush(self.heavy_aps.setdefault(b, []), (-down[a] - 1, a))
+            x = via[b]
+            if x == -1:
+                self._push_root(b)
+                return b
+            down[x] -= delta
+            if lcc:
+                heapq.heappush(self.heavy_blocks.setdefault(x, []), (-below[b], b))
+            a, b = x, up[x]
+
+    def _drop_ap(self, x):
+        del self.ap_blocks[x], self.up[x], self.down[x]
+        self.heavy_blocks.pop(x, None)
+
+    def _rebuild(self, b, rest, top):
+        # Replace block b, which lost the removed vertex, by the blocks of rest.
+        # top is the AP above b when the piece stays attached there, -1 when it
+        # is now a component of its own. Returns the root block of the piece
+        ap_blocks, via, below, down = self.ap_blocks, self.via, self.below, self.down
+        lcc = self.objective == 'lcc'
+        old = below.pop(b)
+        del via[b]
+        self.heavy_aps.pop(b, None)
+        if len(rest) > 1:
+            ids = self._add_blocks(self._blocks_within(rest), replaced=b)
+            if top == -1:
+                return self._hang(ids, -1)[0]
+            self._hang(ids, top)
+            kids = [c for c in ids if via[c] == top]
+            gained = sum(below[c] for c in kids)
+            down[top] += gained - old
+            if lcc:
+                for c in kids:
+                    heapq.heappush(self.heavy_blocks[top], (-below[c], c))
+            return self._shrink(self.up[top], top, old - gained)
+
+        x = rest[0]
+        held = ap_blocks.get(x)
+        if top != -1:
+            # b was the bridge from top down to the removed vertex
+            held.discard(b)
+            if len(held) > 1:
+                self.changed.add(x)
+                down[x] -= old
+                return self._shrink(self.up[x], x, old)
+            parent = self.up[x]
+            self._drop_ap(x)
+            return self._shrink(parent, -1, old)
+        if held is None:
+            r = self._add_blocks([rest])[0]  # Only b held it: now isolated
+            via[r] = -1
+            below[r] = 1
+        else:
+            # Every other block of x hangs from it: the lowest id becomes the root
+            held.discard(b)
+            r = min(held)
+            via[r] = -1
+            if len(held) == 1:
+                self._drop_ap(x)
+                below[r] += 1
+            else:
+                self.changed.add(x)
+                self.up[x] = r
+                down[x] -= below[r]
+                below[r] += 1 + down[x]
+                if lcc:
+                    heapq.heappush(self.heavy_aps.setdefault(r, []), (-down[x] - 1, x))
+        self._push_root(r)
+        return r
+
+    def largest_component(self):
+        return max(self.sizes) if self.sizes else 0
+
+    def _heaviest(self, heap, valid):
+        # (size, item) of the top valid entry of a lazy heap, (0, -1) if none
+        while heap:
+            size, x = heap[0]
+            if valid(x, -size):
+                return -size, x
+            heapq.heappop(heap)
+        return 0, -1
+
+    # (AP to remove next, its damage), or None when no AP does any more damage
+    def next_target(self):
+        if self.objective == 'fragments':
+            heap = self.heap
+            while heap:
+                key, w, stamp = heap[0]
+                if self.removed[w] or stamp != self.stamp[w] or w not in self.ap_blocks:
+                    heapq.heappop(heap)
+                    continue
+                return w, -key[0]
+            return None
+
+        # Only an AP of the (unique) largest component can shrink it
+        via, below, ap_blocks, up, down = self.via, self.below, self.ap_blocks, self.up, self.down
+        total, b = self._heaviest(self.roots, lambda r, size: below.get(r) == size and via[r] == -1)
+        if b == -1 or self.sizes[total] > 1:
+            return None
+        rest = max((size for size in self.sizes if size < total), default=0)
+        # The AP leaving the smallest largest piece is on the heavy path from the
+        # root: follow the heaviest children until the piece above is the larger
+        best = None
+        while True:
+            _, w = self._heaviest(self.heavy_aps.get(b),
+                                  lambda w, size: w in ap_blocks and up[w] == b and down[w] + 1 == size)
+            if w == -1:
+                break
+            child, c = self._heaviest(self.heavy_blocks.get(w),
+                                      lambda c, size: below.get(c) == size and via[c] == w)
+            above = total - 1 - down[w]
+            piece = max(child, above)
+            if best is None or (piece, w) < best:
+                best = (piece, w)
+            if child <= above:
+                break
+            b = c
+        if best is None:
+            return None
+        damage = total - max(best[0], rest)
+        return (best[1], damage) if damage > 0 else None
+
+    # Delete AP v and update blocks, sizes and scores; returns the components added
+    def remove(self, v):
+        self.removed[v] = 1
+        touched = self.ap_blocks.pop(v)
+        parent = self.up.pop(v)
+        del self.down[v]
+        self.heavy_blocks.pop(v, None)
+        totals = []  # Sizes of the pieces cut off below v
+        for b in touched:
+            rest = [w for w in self.blocks.pop(b) if w != v]
+            if b == parent:
+                above = rest
+            else:
+                totals.append(self.below[self._rebuild(b, rest, -1)])
+        remaining = self.below[self._rebuild(parent, above, self.via[parent])]
+        old_size = remaining + 1 + sum(totals)  # v's component before the removal
+        self.sizes[old_size] -= 1
+        if not self.sizes[old_size]:
+            del self.sizes[old_size]
+        for total in totals + [remaining]:
+            self.sizes[total] += 1
+        self.components += len(totals)
+        # Only APs that gained or lost blocks score differently
+        if self.objective == 'fragments':
+            for w in self.changed:
+                if w in self.ap_blocks:
+                    self._push(w)
+        self.changed.clear()
+        return len(totals)
+
+    # Up to `steps` removals; the trajectory starts with the intact graph
+    def run(self, steps, progress=None):
+        trajectory = [{'step': 0, 'node': None, 'damage': 0,
+                       'components': self.components, 'lcc': self.largest_component()}]
+        for step in range(1, steps + 1):
+            target = self.next_target()
+            if target is None:
+                break
+            v, damage = target
+            self.remove(v)
+            trajectory.append({'step': step, 'node': self.csr.ids[v], 'damage': damage,
+                               'components': self.components, 'lcc': self.largest_component()})
+            if progress is not None:
+                progress.tick()
+        return trajectory
+
+
+def targeted_attack(graph, steps, objective='fragments', progress=None):
+    return TargetedAttack(graph, objective).run(steps, progress)
+
+
+#Resilience curves: progressive node/edge removal in the style of Newman-Ziff
+RESILIENCE_MODES = ('node', 'edge')
+RESILIENCE_ORDERS = ('random', 'targeted')
+
+
+# Largest component and component count as nodes or edges are removed one by one, averaged
+# over `runs` orders. Each run replays the order backwards with union-find: O(V + E)
+def resilience_curve(graph, mode='node', order='random', runs=100, seed=None, progress=None):
+    if mode not in RESILIENCE_MODES:
+        raise ValueError(f"mode must be one of {RESILIENCE_MODES}, got {mode!r}")
+    if order not in RESILIENCE_ORDERS:
+        raise ValueError(f"order must be one of {RESILIENCE_ORDERS}, got {order!r}")
+    csr = as_csr(graph)
+    n = csr.n
+    offsets, neighbors = csr.offsets, csr.neighbors
+    rng = random.Random(seed) if seed is not None else random
+
+    if mode == 'node':
+        items = n
+        weight = csr.degree
+    else:
+        # Each undirected edge once, as (u, v) with u < v
+        edge_u, edge_v = array('i'), array('i')
+        for u in range(n):
+            for v in neighbors[offsets[u]:offsets[u + 1]]:
+                if u < v:
+                    edge_u.append(u)
+                    edge_v.append(v)
+        items = len(edge_u)
+        weight = lambda e: csr.degree(edge_u[e]) * csr.degree(edge_v[e])
+
+    lcc_sum = array('d', [0.0]) * (items + 1)
+    components_sum = array('d', [0.0]) * (items + 1)
+    runs = max(runs, 1)
+    for _ in range(runs):
+        sequence = list(range(items))
+        rng.shuffle(sequence)
+        if order == 'targeted':
+            # Stable sort of a shuffled list: ties stay in random order
+            sequence.sort(key=weight, reverse=True)
+
+        parent = array('i', range(n))
+        size = array('i', [1]) * n
+        if mode == 'node':
+            present = bytearray(n)
+            components = largest = 0
+        else:
+            components, largest = n, min(n, 1)
+        lcc_sum[items] += largest
+        components_sum[items] += components
+
+        # Step r holds the graph with sequence[:r] removed; walk r downwards
+        for r in range(items - 1, -1, -1):
+            if mode == 'node':
+                v = sequence[r]
+                present[v] = 1
+                components += 1
+                largest = max(largest, 1)
+                pairs = [(v, w) for w in neighbors[offsets[v]:offsets[v + 1]] if present[w]]
+            else:
+                pairs = ((edge_u[sequence[r]], edge_v[sequence[r]]),)
+            for a, b in pairs:
+                while parent[a] != a:
+                    parent[a] = parent[parent[a]]
+                    a = parent[a]
+                while parent[b] != b:
+                    parent[b] = parent[parent[b]]
+                    b = parent[b]
+                if a == b:
+                    continue
+                if size[a] < size[b]:
+                    a, b = b, a
+                parent[b] = a
+                size[a] += size[b]
+                components -= 1
+                if size[a] > largest:
+                    largest = size[a]
+            lcc_sum[r] += largest
+            components_sum[r] += components
+        if progress is not None:
+            progress.tick()
+
+    return {
+        "mode": mode,
+        "order": order,
+        "runs": runs,
+        "items": items,
+        "removed": list(range(items + 1)),
+        "fraction_removed": [r / items if items else 0.0 for r in range(items + 1)],
+        "lcc_fraction": [total / runs / n if n else 0.0 for total in lcc_sum],
+        "components": [total / runs for total in components_sum],
+    }
+
+
+# Curves as one CSV, one row per step
+def write_resilience_curves(path, curves):
+    with open(path, 'w') as f:
+        f.write("mode,order,runs,removed,fraction_removed,lcc_fraction,components\n")
+        for curve in curves:
+            for r in curve["removed"]:
+                f.write(f"{curve['mode']},{curve['order']},{curve['runs']},{r},"
+                        f"{curve['fraction_removed'][r]:.6f},{curve['lcc_fraction'][r]:.6f},"
+                        f"{curve['components'][r]:.4f}\n")
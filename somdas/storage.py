@@ -0,0 +1,118 @@
+#Array bundles and working arrays that spill to disk past a RAM cap
+from array import array
+from contextlib import contextmanager
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+
+#Array bundles: named flat arrays in one file, memory-mapped read-only by readers
+BUNDLE_MAGIC = b'SOMDASAB'
+BUNDLE_ALIGN = 64
+
+
+def _aligned(nbytes):
+    return (nbytes + BUNDLE_ALIGN - 1) // BUNDLE_ALIGN * BUNDLE_ALIGN
+
+
+# Named arrays in one file: magic, JSON header, then each array's bytes 64-byte aligned
+def write_array_bundle(path, arrays, meta=None):
+    with open(path, 'wb') as f:
+        _write_bundle_header(f, {name: (getattr(arr, 'typecode', None) or arr.format, len(arr))
+                                 for name, arr in arrays.items()}, meta)
+        for arr in arrays.values():
+            raw = memoryview(arr).cast('B')
+            f.write(raw)
+            f.write(bytes(_aligned(len(raw)) - len(raw)))
+
+
+# Same, copying each array from a raw binary file (for arrays larger than memory)
+def write_array_bundle_files(path, parts, meta=None):
+    with open(path, 'wb') as f:
+        _write_bundle_header(f, {name: (typecode, length) for name, (typecode, length, _) in parts.items()}, meta)
+        for typecode, length, source in parts.values():
+            nbytes = length * array(typecode).itemsize
+            source.seek(0)
+            shutil.copyfileobj(source, f, 1 << 20)
+            f.write(bytes(_aligned(nbytes) - nbytes))
+
+
+def _write_bundle_header(f, sections, meta):
+    # sections: name -> (typecode, length), in the order the data follows
+    layout = {}
+    offset = 0
+    for name, (typecode, length) in sections.items():
+        layout[name] = [typecode, offset, length]
+        offset += _aligned(length * array(typecode).itemsize)
+    header = json.dumps({'meta': meta or {}, 'arrays': layout}).encode()
+    data_start = _aligned(16 + len(header))
+    f.write(BUNDLE_MAGIC)
+    f.write(struct.pack('<Q', len(header)))
+    f.write(header)
+    f.write(bytes(data_start - 16 - len(header)))
+
+
+# Map a bundle read-only: (meta, {name: typed memoryview}), pages shared between processes
+def map_array_bundle(path):
+    with open(path, 'rb') as f:
+        if f.read(8) != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not an array bundle")
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data_start = _aligned(16 + header_len)
+    buf = memoryview(mapping)
+    views = {}
+    for name, (typecode, offset, length) in header['arrays'].items():
+        start = data_start + offset
+        views[name] = buf[start:start + length * array(typecode).itemsize].cast(typecode)
+    return header['meta'], views
+
+
+# Temporary bundle for worker processes (in /dev/shm when possible), removed on exit
+@contextmanager
+def shared_bundle(arrays, meta=None, in_memory=True):
+    shm_dir = '/dev/shm' if in_memory and os.path.isdir('/dev/shm') else None
+    fd, path = tempfile.mkstemp(prefix='somdas-', suffix='.bundle', dir=shm_dir)
+    os.close(fd)
+    try:
+        write_array_bundle(path, arrays, meta)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+#Working arrays of the traversals, spilled to memory-mapped scratch files past a RAM cap
+class Workspace:
+
+    def __init__(self, ram_cap=None, directory=None):
+        self.ram_cap = ram_cap
+        self.directory = directory
+        self.in_ram = 0
+        self.spilled = 0
+        self._files = []  # Keeps the scratch files open for as long as their views are used
+
+    # n items of fill, or a copy of source[:n]
+    def alloc(self, typecode, n, fill=0, source=None):
+        nbytes = n * array(typecode).itemsize
+        if self.ram_cap is None or self.in_ram + nbytes <= self.ram_cap:
+            self.in_ram += nbytes
+            if source is not None:
+                return array(typecode, source[:n])
+            return array(typecode, [fill]) * n
+        self.spilled += nbytes
+        scratch = tempfile.TemporaryFile(dir=self.directory)
+        scratch.truncate(max(nbytes, 1))
+        self._files.append(scratch)
+        view = memoryview(mmap.mmap(scratch.fileno(), max(nbytes, 1)))[:nbytes].cast(typecode)
+        if source is not None:
+            view[:] = source[:n]
+        elif fill:
+            block = array(typecode, [fill]) * min(n, 1 << 16)
+            for start in range(0, n, len(block)):
+                end = min(n, start + len(block))
+                view[start:end] = block[:end - start]
+        return view
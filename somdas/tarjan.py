@@ -0,0 +1,897 @@
+#Tarjan's DFS and everything derived from it: APs, bridges, impacts, blocks, oracles
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+import json
+from somdas.storage import map_array_bundle, shared_bundle, Workspace
+from somdas.graph import _unmask, as_csr, CSRGraph
+
+
+# Iterative DFS giving the spanning forest and Tarjan low-links: order (preorder), parent
+# (-1 for roots), disc and low. roots limits it to those vertices' components
+def dfs_lowpoints(graph, workspace=None, roots=None):
+    csr, view = _unmask(graph)
+    n = csr.n
+    offsets, neighbors = csr.offsets, csr.neighbors
+    alloc = (workspace or Workspace()).alloc
+    disc = alloc('i', n, -1)
+    cut = None
+    if view is not None:
+        for v in view.removed_nodes:
+            disc[v] = n  # Never discovered, and too late to lower any low-link
+        cut = view.cut or None
+    low = alloc('i', n)
+    parent = alloc('i', n, -1)
+    order = alloc('i', n)  # order[t] is the vertex discovered at time t
+    # pos[u] is the next slot of u's neighbour list still to be scanned
+    pos = alloc('q', n, source=offsets)
+    stack = alloc('i', n)
+    top = -1
+    t = 0
+
+    for root in range(n) if roots is None else roots:
+        if disc[root] != -1:
+            continue
+        disc[root] = low[root] = t
+        order[t] = root
+        t += 1
+        top = 0
+        stack[0] = root
+        while top >= 0:
+            u = stack[top]
+            pu = parent[u]
+            low_u = low[u]
+            i = pos[u]
+            end = offsets[u + 1]
+            skip = cut.get(u) if cut else None
+            descended = False
+            while i < end:
+                v = neighbors[i]
+                i += 1
+                if skip is not None and v in skip:
+                    continue
+                dv = disc[v]
+                if dv == -1:
+                    # Tree edge: descend into v and resume u later
+                    parent[v] = u
+                    disc[v] = low[v] = t
+                    order[t] = v
+                    t += 1
+                    top += 1
+                    stack[top] = v
+                    descended = True
+                    break
+                # Back edge (anything already discovered except the parent)
+                if dv < low_u and v != pu:
+                    low_u = dv
+            low[u] = low_u
+            pos[u] = i
+            if not descended:
+                # u is finished: pass its low-link up to the parent
+                top -= 1
+                if pu != -1 and low_u < low[pu]:
+                    low[pu] = low_u
+
+    if t < n:
+        order = order[:t]
+    return order, parent, disc, low
+
+
+#Findal ALL APs using Trajan's
+def find_articulation_points_and_bridges(graph, ram_cap=None, lowpoints=None, workers=1):
+    
+    csr, view = _unmask(graph)
+    if csr.n == 0:
+        return [], []
+    if workers > 1 and lowpoints is None and view is None:
+        return parallel_articulation_points_and_bridges(csr, workers, ram_cap)
+
+    ids = csr.ids
+    # Working arrays stay within ram_cap bytes of RAM (None = no cap), see Workspace
+    # lowpoints: the dfs_lowpoints() arrays when a backend has already computed them
+    workspace = Workspace(ram_cap)
+    order, parent, disc, low = lowpoints or dfs_lowpoints(graph, workspace)
+    aps_flags, bridges = _articulation_flags(csr, order, parent, disc, low, workspace)
+    aps = [ids[i] for i in range(csr.n) if aps_flags[i]]
+
+    return aps, bridges
+
+
+# AP flags (by vertex index) and bridges (as id pairs, in DFS preorder of the
+# child end) from the dfs_lowpoints() arrays of the vertices in order
+def _articulation_flags(csr, order, parent, disc, low, workspace):
+    ids = csr.ids
+    aps_flags = workspace.alloc('B', csr.n)
+    root_children = workspace.alloc('B', csr.n)
+    bridges = []
+
+    for v in order:
+        u = parent[v]
+        if u == -1 or low[v] < disc[u]:
+            continue
+        if parent[u] == -1:
+            # Case 1: u is root and has at least 2 children
+            if root_children[u]:
+                aps_flags[u] = 1
+            root_children[u] = 1
+        else:
+            # Case 2: u is not root and low[v] >= disc[u]
+            aps_flags[u] = 1
+        # Check for bridge: if low[v] > disc[u], then (u,v) is a bridge
+        if low[v] > disc[u]:
+            bridges.append((ids[u], ids[v]))
+    return aps_flags, bridges
+
+
+#Parallel AP/bridge detection, one task per group of connected components
+# Worker state: the graph mapped from the shared bundle, never pickled
+_worker_graph = None
+_worker_ram_cap = None
+
+
+def _init_biconnectivity_worker(path, ram_cap):
+    global _worker_graph, _worker_ram_cap
+    _, views = map_array_bundle(path)
+    _worker_graph = CSRGraph(views['offsets'], views['neighbors'], views['ids'])
+    _worker_ram_cap = ram_cap
+
+
+def _owned_lowpoints(csr, lo, hi, workspace):
+    # dfs_lowpoints() from the roots lo..hi-1, abandoning any component that reaches below lo.
+    # Only a vertex with no smaller neighbour can be the lowest of its component, so only those
+    # are tried as roots, and a search stops at the first vertex it finds with a neighbour
+    # below lo (or in an abandoned search): non-owners waste little more than their own range
+    n = csr.n
+    offsets, neighbors = csr.offsets, csr.neighbors
+    alloc = workspace.alloc
+    disc = alloc('i', n, -1)
+    low = alloc('i', n)
+    parent = alloc('i', n, -1)
+    order = alloc('i', n)
+    pos = alloc('q', n, source=offsets)
+    stack = alloc('i', n)
+    kept = []  # (start, end) slices of order holding whole owned components
+    t = 0
+
+    for root in range(lo, hi):
+        if disc[root] != -1:
+            continue
+        if offsets[root] < offsets[root + 1] and min(neighbors[offsets[root]:offsets[root + 1]]) < root:
+            continue
+        start = t
+        disc[root] = low[root] = t
+        order[t] = root
+        t += 1
+        top = 0
+        stack[0] = root
+        foreign = False
+        while top >= 0:
+            u = stack[top]
+            pu = parent[u]
+            low_u = low[u]
+            i = pos[u]
+            end = offsets[u + 1]
+            descended = False
+            while i < end:
+                v = neighbors[i]
+                i += 1
+                dv = disc[v]
+                if dv == -1 and v >= lo:
+                    if lo and min(neighbors[offsets[v]:offsets[v + 1]]) < lo:
+                        foreign = True
+                        break
+                    parent[v] = u
+                    disc[v] = low[v] = t
+                    order[t] = v
+                    t += 1
+                    top += 1
+                    stack[top] = v
+                    descended = True
+                    break
+                if dv < start:
+                    # Below lo, or seen by an abandoned search: not our component
+                    foreign = True
+                    break
+                if dv < low_u and v != pu:
+                    low_u = dv
+            if foreign:
+                break
+            low[u] = low_u
+            pos[u] = i
+            if not descended:
+                top -= 1
+                if pu != -1 and low_u < low[pu]:
+                    low[pu] = low_u
+        if not foreign:
+            kept.append((start, t))
+
+    owned = array('i')
+    for start, end in kept:
+        owned.extend(order[start:end])
+    return owned, parent, disc, low
+
+
+def _biconnectivity_range(bounds):
+    # The same DFS as the sequential pass, for the components rooted in [lo, hi)
+    lo, hi = bounds
+    csr = _worker_graph
+    workspace = Workspace(_worker_ram_cap)
+    order, parent, disc, low = _owned_lowpoints(csr, lo, hi, workspace)
+    aps_flags, bridges = _articulation_flags(csr, order, parent, disc, low, workspace)
+    return [csr.ids[v] for v in order if aps_flags[v]], bridges
+
+
+# find_articulation_points_and_bridges on a process pool, same result and order. Each worker
+# takes a vertex range with about equal edges and keeps the components rooted in it (see
+# _owned_lowpoints); one worker still walks the largest component on its own, so one giant
+# component gets no speed-up (that would need Tarjan-Vishkin, not implemented)
+def parallel_articulation_points_and_bridges(graph, workers, ram_cap=None):
+    csr = as_csr(graph)
+    n = csr.n
+    if workers <= 1 or n < 2:
+        return find_articulation_points_and_bridges(csr, ram_cap)
+
+    # Range boundaries at every 1/workers of the adjacency entries
+    offsets = csr.offsets
+    step = offsets[n] / workers
+    cuts = [0]
+    for k in range(1, workers):
+        cut = min(bisect_left(offsets, round(k * step), 0, n + 1), n)
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    if cuts[-1] < n:
+        cuts.append(n)
+    ranges = list(zip(cuts, cuts[1:]))
+
+    arrays = {'offsets': csr.offsets, 'neighbors': csr.neighbors, 'ids': csr.ids}
+    with shared_bundle(arrays, in_memory=ram_cap is None) as path:
+        with ProcessPoolExecutor(max_workers=len(ranges), initializer=_init_biconnectivity_worker,
+                                 initargs=(path, ram_cap)) as pool:
+            results = list(pool.map(_biconnectivity_range, ranges))
+
+    aps = sorted(ap for range_aps, _ in results for ap in range_aps)
+    bridges = [bridge for _, range_bridges in results for bridge in range_bridges]
+    return aps, bridges
+
+
+# Subtree sizes of the DFS forest. Children come after their parent in
+# preorder, so one reverse sweep accumulates every subtree.
+def subtree_sizes(order, parent):
+    size = array('i', [1]) * len(parent)
+    for v in reversed(order):
+        p = parent[v]
+        if p != -1:
+            size[p] += size[v]
+    return size
+
+
+# Root of every vertex's DFS tree, the component count and the two largest component sizes
+def component_roots(order, parent, size):
+    root = array('i', [0]) * len(parent)
+    components = 0
+    largest_root, first, second = -1, 0, 0
+    for v in order:
+        p = parent[v]
+        if p != -1:
+            root[v] = root[p]
+            continue
+        root[v] = v
+        components += 1
+        s = size[v]
+        if s > first:
+            largest_root, first, second = v, s, first
+        elif s > second:
+            second = s
+    return root, components, largest_root, first, second
+
+
+# Deleting v cuts off each DFS child c with low[c] >= disc[v] with its subtree. Returns (components, fragments, lcc_sizes): per vertex index, the component count and
+# largest component once that vertex alone is deleted
+def vertex_removal_impacts(graph, lowpoints=None):
+    csr = as_csr(graph)
+    n = csr.n
+    order, parent, disc, low = lowpoints or dfs_lowpoints(csr)
+    size = subtree_sizes(order, parent)
+    root, components, largest_root, first, second = component_roots(order, parent, size)
+
+    cut_count = array('i', [0]) * n
+    cut_total = array('i', [0]) * n
+    cut_max = array('i', [0]) * n
+    for v in order:
+        u = parent[v]
+        if u != -1 and low[v] >= disc[u]:
+            s = size[v]
+            cut_count[u] += 1
+            cut_total[u] += s
+            if s > cut_max[u]:
+                cut_max[u] = s
+
+    fragments = array('i', [0]) * n
+    lcc_sizes = array('i', [0]) * n
+    for v in range(n):
+        r = root[v]
+        pieces = cut_count[v]
+        largest = cut_max[v]
+        if v != r:
+            # The part above v, still holding the DFS root
+            pieces += 1
+            rest = size[r] - 1 - cut_total[v]
+            if rest > largest:
+                largest = rest
+        other = second if r == largest_root else first
+        fragments[v] = components - 1 + pieces
+        lcc_sizes[v] = largest if largest > other else other
+    return components, fragments, lcc_sizes
+
+
+# Deleting bridge (u, v), v the DFS child, splits off v's subtree. Returns (components, impacts), one (bridge, fragments, side_u, side_v, lcc_size) per
+# bridge; an edge that is not a bridge changes nothing
+def bridge_removal_impacts(graph, bridges=None, lowpoints=None):
+    csr = as_csr(graph)
+    ids = csr.ids
+    order, parent, disc, low = lowpoints or dfs_lowpoints(csr)
+    size = subtree_sizes(order, parent)
+    root, components, largest_root, first, second = component_roots(order, parent, size)
+
+    if bridges is None:
+        bridges = [(ids[parent[v]], ids[v]) for v in order
+                   if parent[v] != -1 and low[v] > disc[parent[v]]]
+
+    impacts = []
+    for bridge in bridges:
+        u, v = csr.index_of(bridge[0]), csr.index_of(bridge[1])
+        r = root[u]
+        other = second if r == largest_root else first
+        if parent[v] == u and low[v] > disc[u]:
+            side_u, side_v = size[r] - size[v], size[v]
+        elif parent[u] == v and low[u] > disc[v]:
+            side_u, side_v = size[u], size[r] - size[u]
+        else:
+            impacts.append((bridge, components, size[r], size[r], first))
+            continue
+        lcc_size = max(side_u, side_v, other)
+        impacts.append((bridge, components + 1, side_u, side_v, lcc_size))
+    return components, impacts
+
+
+#Biconnected components (blocks), streamed as the DFS finishes them
+# One biconnected component: nodes and attached_aps as id arrays, edges only if requested
+class Block:
+
+    __slots__ = ('index', 'nodes', 'edges', 'size', 'edge_count', 'attached_aps')
+
+    def __init__(self, index, nodes, edges, edge_count, attached_aps):
+        self.index = index
+        self.nodes = nodes
+        self.edges = edges
+        self.size = len(nodes)
+        self.edge_count = edge_count
+        self.attached_aps = attached_aps
+
+    def as_dict(self):
+        record = {'block': self.index, 'size': self.size, 'edge_count': self.edge_count,
+                  'nodes': self.nodes.tolist(), 'attached_aps': self.attached_aps.tolist()}
+        if self.edges is not None:
+            record['edges'] = self.edges
+        return record
+
+
+# Yield the blocks as the DFS finishes them (edge stack + vertex stack), so only the blocks
+# still open on the DFS path are in memory
+def iter_blocks(graph, with_edges=False):
+    csr = as_csr(graph)
+    n = csr.n
+    ids = csr.ids
+    offsets, neighbors = csr.offsets, csr.neighbors
+    disc = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    parent = array('i', [-1]) * n
+    children = array('i', [0]) * n
+    is_ap = bytearray(n)
+    pos = array('q', offsets[:n])
+    stack = array('i')
+    vertex_stack = array('i')
+    edge_u, edge_v = array('i'), array('i')
+    vertex_mark = array('i', [0]) * n  # vertex_stack length when each vertex was pushed
+    edge_mark = array('i', [0]) * n    # edge stack length before the tree edge into each vertex
+    t = 0
+    index = 0
+
+    for root in range(n):
+        if disc[root] != -1:
+            continue
+        disc[root] = low[root] = t
+        t += 1
+        if offsets[root + 1] == offsets[root]:
+            yield Block(index, array('q', [ids[root]]), [] if with_edges else None, 0, array('q'))
+            index += 1
+            continue
+        stack.append(root)
+        while stack:
+            u = stack[-1]
+            pu = parent[u]
+            low_u = low[u]
+            du = disc[u]
+            i = pos[u]
+            end = offsets[u + 1]
+            descended = False
+            while i < end:
+                v = neighbors[i]
+                i += 1
+                dv = disc[v]
+                if dv == -1:
+                    parent[v] = u
+                    children[u] += 1
+                    disc[v] = low[v] = t
+                    t += 1
+                    edge_mark[v] = len(edge_u)
+                    edge_u.append(u)
+                    edge_v.append(v)
+                    vertex_mark[v] = len(vertex_stack)
+                    vertex_stack.append(v)
+                    stack.append(v)
+                    descended = True
+                    break
+                if dv < du and v != pu:
+                    # Back edge to an ancestor, pushed once from the lower end
+                    edge_u.append(u)
+                    edge_v.append(v)
+                    if dv < low_u:
+                        low_u = dv
+            low[u] = low_u
+            pos[u] = i
+            if descended:
+                continue
+            stack.pop()
+            if pu == -1:
+                continue
+            if low_u < low[pu]:
+                low[pu] = low_u
+            if low_u < disc[pu]:
+                continue
+
+            # u's subtree minus its earlier blocks, plus pu, is one block
+            if parent[pu] != -1:
+                is_ap[pu] = 1
+            else:
+                j, end_pu = pos[pu], offsets[pu + 1]
+                while j < end_pu and disc[neighbors[j]] != -1:
+                    j += 1
+                pos[pu] = j
+                if children[pu] > 1 or j < end_pu:
+                    is_ap[pu] = 1
+            members = vertex_stack[vertex_mark[u]:]
+            del vertex_stack[vertex_mark[u]:]
+            mark = edge_mark[u]
+            edge_count = len(edge_u) - mark
+            edges = None
+            if with_edges:
+                edges = [(ids[a], ids[b]) for a, b in zip(edge_u[mark:], edge_v[mark:])]
+            del edge_u[mark:]
+            del edge_v[mark:]
+            members.append(pu)
+            yield Block(index, array('q', (ids[v] for v in members)), edges, edge_count,
+                        array('q', (ids[v] for v in members if is_ap[v])))
+            index += 1
+
+
+# Blocks to a JSON Lines file, one per line; returns how many
+def write_blocks(blocks, path):
+    count = 0
+    with open(path, 'w') as f:
+        for block in blocks:
+            f.write(json.dumps(block.as_dict()) + '\n')
+            count += 1
+    return count
+
+
+#Separation pairs: {x, y} in one block whose joint removal splits it
+# Yield (x, y, fragments, lcc_size), x < y ids, for every pair of one block that splits it
+# when both go. One Tarjan over B - x per vertex x: quadratic per block (a linear SPQR-tree
+# decomposition is not implemented). Blocks with more than max_block_size vertices are
+# skipped, and appended to skipped as (size, smallest node id) when a list is given
+def iter_separation_pairs(graph, max_block_size=None, skipped=None):
+    csr = as_csr(graph)
+    n = csr.n
+    ids = csr.ids
+    offsets, neighbors = csr.offsets, csr.neighbors
+    order, parent, disc, low = dfs_lowpoints(csr)
+    size = subtree_sizes(order, parent)
+    root, components, largest_root, first, second = component_roots(order, parent, size)
+
+    # Separating DFS children of every vertex: count, total size, two largest
+    # sizes; and the members of every block but its top, keyed by its head
+    cut_count = array('i', [0]) * n
+    cut_total = array('i', [0]) * n
+    cut_max = array('i', [0]) * n
+    cut_max2 = array('i', [0]) * n
+    block_of = array('i', [-1]) * n
+    members = {}
+    for v in order:
+        u = parent[v]
+        if u == -1:
+            continue
+        if low[v] >= disc[u]:
+            s = size[v]
+            cut_count[u] += 1
+            cut_total[u] += s
+            if s > cut_max[u]:
+                cut_max2[u] = cut_max[u]
+                cut_max[u] = s
+            elif s > cut_max2[u]:
+                cut_max2[u] = s
+            block_of[v] = v
+            members[v] = [v]
+        else:
+            block_of[v] = block_of[u]
+            members[block_of[v]].append(v)
+    del block_of
+
+    weight = array('i', [0]) * n      # Vertices gone with v that are outside v's block
+    out_count = array('i', [0]) * n   # Pieces v cuts off outside its block
+    out_max = array('i', [0]) * n     # Largest of them
+    local = array('i', [-1]) * n      # Position of v in the current block, -1 outside it
+
+    for h, block in members.items():
+        p = parent[h]
+        block.append(p)
+        k = len(block)
+        if k < 4:
+            continue
+        if max_block_size is not None and k > max_block_size:
+            if skipped is not None:
+                skipped.append((k, min(ids[v] for v in block)))
+            continue
+        r = root[p]
+        other = second if r == largest_root else first
+        for u in block:
+            weight[u] = 1 + cut_total[u]
+            out_count[u] = cut_count[u]
+            out_max[u] = cut_max[u]
+        # The top also loses the part above the block and not its own head
+        rest = size[r] - 1 - cut_total[p] if p != r else 0
+        weight[p] = size[r] - size[h]
+        out_count[p] = cut_count[p] - 1 + (p != r)
+        out_max[p] = max(cut_max2[p] if cut_max[p] == size[h] else cut_max[p], rest)
+
+        # The block's own adjacency, in positions sorted like the node ids, so
+        # the searches never scan edges leaving the block
+        block.sort()
+        for j, u in enumerate(block):
+            local[u] = j
+        adj_offsets = array('i', [0]) * (k + 1)
+        adj = array('i')
+        for j, u in enumerate(block):
+            adj.extend(local[w] for w in neighbors[offsets[u]:offsets[u + 1]] if local[w] != -1)
+            adj_offsets[j + 1] = len(adj)
+        for u in block:
+            local[u] = -1
+        wt = array('i', (weight[u] for u in block))
+
+        seen = array('i', [-1]) * k
+        d = array('i', [0]) * k
+        lw = array('i', [0]) * k
+        pos = array('i', [0]) * k
+        below = array('i', [0]) * k   # Weight of the search subtree
+        sep_count = array('i', [0]) * k
+        sep_total = array('i', [0]) * k
+        sep_max = array('i', [0]) * k
+        for x in range(k - 1):  # The last vertex's pairs were all reported from their smaller end
+            total = size[r] - wt[x]
+            start = 1 if x == 0 else 0
+            seen[start] = x
+            d[start] = lw[start] = 0
+            t = 1
+            pos[start] = adj_offsets[start]
+            below[start] = wt[start]
+            sep_count[start] = sep_total[start] = sep_max[start] = 0
+            stack = [start]
+            parents = [-1]
+            while stack:
+                u = stack[-1]
+                low_u = lw[u]
+                i, end = pos[u], adj_offsets[u + 1]
+                descended = False
+                while i < end:
+                    w = adj[i]
+                    i += 1
+                    if w == x:
+                        continue
+                    if seen[w] != x:
+                        seen[w] = x
+                        d[w] = lw[w] = t
+                        t += 1
+                        pos[w] = adj_offsets[w]
+                        below[w] = wt[w]
+                        sep_count[w] = sep_total[w] = sep_max[w] = 0
+                        stack.append(w)
+                        parents.append(u)
+                        descended = True
+                        break
+                    if d[w] < low_u:
+                        low_u = d[w]
+                lw[u] = low_u
+                pos[u] = i
+                if descended:
+                    continue
+                stack.pop()
+                pu = parents.pop()
+                if pu != -1:
+                    below[pu] += below[u]
+                    if low_u < lw[pu]:
+                        lw[pu] = low_u
+                    if low_u >= d[pu]:
+                        sep_count[pu] += 1
+                        sep_total[pu] += below[u]
+                        if below[u] > sep_max[pu]:
+                            sep_max[pu] = below[u]
+                # u is finished: is it an AP of B - x?
+                if u < x:
+                    continue
+                pieces = sep_count[u]
+                largest = sep_max[u]
+                if pu != -1:
+                    if not pieces:
+                        continue
+                    pieces += 1
+                    above = total - wt[u] - sep_total[u]
+                    if above > largest:
+                        largest = above
+                elif pieces < 2:
+                    continue
+                vx, vu = block[x], block[u]
+                fragments = components - 1 + out_count[vx] + out_count[vu] + pieces
+                lcc = max(other, out_max[vx], out_max[vu], largest)
+                yield ids[vx], ids[vu], fragments, lcc
+
+
+# (x, y, fragments, lcc_size) pairs to a CSV file; returns how many
+def write_separation_pairs(pairs, path):
+    count = 0
+    with open(path, 'w') as f:
+        f.write("x,y,fragments,lcc_size\n")
+        for x, y, fragments, lcc in pairs:
+            f.write(f"{x},{y},{fragments},{lcc}\n")
+            count += 1
+    return count
+
+
+#Connectivity oracle: what-if queries for one failed vertex or edge
+# Single-failure what-if queries after one DFS: preorder intervals tell which side of a
+# failed vertex or bridge a node is on. Methods take ids, *_index variants dense indices
+class ConnectivityOracle:
+
+    def __init__(self, graph):
+        self.csr = csr = as_csr(graph)
+        n = csr.n
+        order, parent, disc, low = dfs_lowpoints(csr)
+        size = subtree_sizes(order, parent)
+        root, components, _, _, _ = component_roots(order, parent, size)
+        self.parent, self.disc, self.low, self.size, self.root = parent, disc, low, size, root
+        self.components = components
+
+        # Children of every vertex in preorder (CSR layout), with their
+        # discovery times alongside for bisection
+        child_offsets = array('q', [0]) * (n + 1)
+        for v in range(n):
+            if parent[v] != -1:
+                child_offsets[parent[v] + 1] += 1
+        for v in range(n):
+            child_offsets[v + 1] += child_offsets[v]
+        fill = array('q', child_offsets[:n])
+        children = array('i', [0]) * (n - components)
+        for v in order:
+            p = parent[v]
+            if p != -1:
+                children[fill[p]] = v
+                fill[p] += 1
+        self.child_offsets = child_offsets
+        self.children = children
+        self.child_disc = array('i', (disc[c] for c in children))
+
+        # Components left after deleting each vertex
+        after = array('i', [components]) * n
+        for v in range(n):
+            if parent[v] == -1:
+                after[v] -= 1
+        for c in children:
+            p = parent[c]
+            if parent[p] == -1 or low[c] >= disc[p]:
+                after[p] += 1
+        self.components_after = after
+
+    # True if u lies in the DFS subtree of w
+    def _below(self, u, w):
+        return self.disc[w] <= self.disc[u] < self.disc[w] + self.size[w]
+
+    def _side_of_vertex_failure(self, u, x):
+        # Which piece of x's component u lands in once x is deleted: the
+        # separating child subtree holding it, or -1 for the parent side
+        if not self._below(u, x):
+            return -1
+        lo, hi = self.child_offsets[x], self.child_offsets[x + 1]
+        c = self.children[bisect_right(self.child_disc, self.disc[u], lo, hi) - 1]
+        if self.parent[x] == -1 or self.low[c] >= self.disc[x]:
+            return c
+        return -1
+
+    # DFS child of edge (a, b) if it is a bridge, else -1
+    def _bridge_child(self, a, b):
+        parent, disc, low = self.parent, self.disc, self.low
+        if parent[b] == a and low[b] > disc[a]:
+            return b
+        if parent[a] == b and low[a] > disc[b]:
+            return a
+        return -1
+
+    def connected_index(self, u, v, failed_vertex=-1, failed_edge=None):
+        if u == failed_vertex or v == failed_vertex:
+            return False
+        if self.root[u] != self.root[v]:
+            return False
+        if u == v:
+            return True
+        if failed_vertex != -1:
+            if self.root[failed_vertex] != self.root[u]:
+                return True
+            return (self._side_of_vertex_failure(u, failed_vertex)
+                    == self._side_of_vertex_failure(v, failed_vertex))
+        if failed_edge is not None:
+            c = self._bridge_child(*failed_edge)
+            if c != -1:
+                return self._below(u, c) == self._below(v, c)
+        return True
+
+    def components_without_vertex_index(self, x):
+        return self.components_after[x] if x != -1 else self.components
+
+    def components_without_edge_index(self, a, b):
+        return self.components + (a != -1 and b != -1 and self._bridge_child(a, b) != -1)
+
+    def _index(self, node):
+        idx = self.csr.index_of(node)
+        if idx == -1:
+            raise KeyError(f"node {node} is not in the graph")
+        return idx
+
+    def _failure(self, failure):
+        # None, a vertex id or an (a, b) edge -> (failed vertex, failed edge)
+        # as dense indices; failures outside the graph remove nothing
+        if failure is None:
+            return -1, None
+        if isinstance(failure, tuple):
+            a, b = (self.csr.index_of(e) for e in failure)
+            return -1, ((a, b) if a != -1 and b != -1 else None)
+        return self.csr.index_of(failure), None
+
+    # Are u and v connected once `failure` (node id, (a, b) edge or None) is gone?
+    def connected(self, u, v, failure=None):
+        return self.connected_index(self._index(u), self._index(v), *self._failure(failure))
+
+    # Number of components once `failure` is gone
+    def components_without(self, failure=None):
+        vertex, edge = self._failure(failure)
+        if edge is not None:
+            return self.components_without_edge_index(*edge)
+        return self.components_without_vertex_index(vertex)
+
+    # connected() for a list of (u, v, failure) triples
+    def connected_batch(self, queries):
+        index_cache = {}
+        failure_cache = {}
+        answers = []
+        for u, v, failure in queries:
+            for node in (u, v):
+                if node not in index_cache:
+                    index_cache[node] = self._index(node)
+            if failure not in failure_cache:
+                failure_cache[failure] = self._failure(failure)
+            answers.append(self.connected_index(index_cache[u], index_cache[v],
+                                                *failure_cache[failure]))
+        return answers
+
+
+#Incremental bridges: 2-edge-connectivity under edge insertions
+# Bridge count of a graph on vertices 0..n-1 under edge insertions, O(log n) amortized each:
+# union-find over 2-edge-connected components, whose forest edges are the bridges. An edge
+# closing a cycle merges every component on the tree path between its ends
+class IncrementalBridges:
+
+    def __init__(self, n):
+        self.n = n
+        self.two_edge = array('i', range(n))   # union-find over 2-edge-connected components
+        self.tree = array('i', range(n))       # union-find over connected components
+        self.tree_size = array('i', [1]) * n
+        self.up = array('i', [-1]) * n         # bridge forest parent (any member of it)
+        self.visited = array('I', [0]) * n
+        self.walk = 0
+        self.bridges = 0
+        self.edges = 0
+        self.pairs = set()  # (min, max) of every edge inserted, so a repeat is ignored
+
+    def find_two_edge(self, v):
+        two_edge = self.two_edge
+        root = v
+        while two_edge[root] != root:
+            root = two_edge[root]
+        while two_edge[v] != root:
+            two_edge[v], v = root, two_edge[v]
+        return root
+
+    def find_tree(self, v):
+        tree = self.tree
+        root = v = self.find_two_edge(v)
+        while tree[root] != root:
+            root = tree[root]
+        while tree[v] != root:
+            tree[v], v = root, tree[v]
+        return root
+
+    def _reroot(self, v):
+        # Reverse the forest path from v to its root; v becomes the root
+        up, tree = self.up, self.tree
+        v = self.find_two_edge(v)
+        root, child = v, -1
+        while v != -1:
+            above = up[v]
+            if above != -1:
+                above = self.find_two_edge(above)
+            up[v] = child
+            tree[v] = root
+            child, v = v, above
+        self.tree_size[root] = self.tree_size[child]
+
+    def _merge_path(self, a, b):
+        up, visited, two_edge = self.up, self.visited, self.two_edge
+        self.walk += 1
+        walk = self.walk
+        path_a, path_b = [], []
+        meet = -1
+        while meet == -1:
+            if a != -1:
+                a = self.find_two_edge(a)
+                path_a.append(a)
+                if visited[a] == walk:
+                    meet = a
+                    break
+                visited[a] = walk
+                a = up[a]
+            if b != -1:
+                b = self.find_two_edge(b)
+                path_b.append(b)
+                if visited[b] == walk:
+                    meet = b
+                    break
+                visited[b] = walk
+                b = up[b]
+        for path in (path_a, path_b):
+            for v in path:
+                two_edge[v] = meet
+                if v == meet:
+                    break
+                self.bridges -= 1
+
+    # Insert edge (a, b) and return the new bridge count
+    def add_edge(self, a, b):
+        pair = (a, b) if a < b else (b, a)
+        if a == b or pair in self.pairs:
+            return self.bridges
+        self.pairs.add(pair)
+        self.edges += 1
+        a = self.find_two_edge(a)
+        b = self.find_two_edge(b)
+        if a == b:
+            return self.bridges
+        tree_a = self.find_tree(a)
+        tree_b = self.find_tree(b)
+        if tree_a != tree_b:
+            self.bridges += 1
+            if self.tree_size[tree_a] > self.tree_size[tree_b]:
+                a, b, tree_a, tree_b = b, a, tree_b, tree_a
+            self._reroot(a)
+            self.up[a] = b
+            self.tree[a] = b
+            self.tree_size[tree_b] += self.tree_size[a]
+        else:
+            self._merge_path(a, b)
+        return self.bridges